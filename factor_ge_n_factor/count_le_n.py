@@ -6,7 +6,6 @@ with product(A)=N and every a∈A ≥ |A|.
 """
 
 import sys
-import math
 from functools import lru_cache
 
 def build_factors(n_max):
@@ -17,18 +16,22 @@ def build_factors(n_max):
             factors[j].append(i)
     return factors
 
-def find_multiset(n, k, factors):
+def find_multiset(n, k, factors, stats=None):
     """
     Try to find exactly k factors (all ≥ k) whose product is n.
     Returns one valid list of factors if possible, else None.
+    If stats (a collections.Counter) is given, DFS nodes and memo hits/misses are added to it.
     """
+    # k_pows[i] = k^i, so the prune below is a table lookup per node
+    k_pows = [k ** i for i in range(k + 1)]
+
     @lru_cache(None)
     def helper(remaining, depth):
         # If we've picked k factors, remaining must be 1
         if depth == k:
             return [] if remaining == 1 else None
         # Prune: smallest possible product of the rest is k^(k-depth)
-        if remaining < k ** (k - depth):
+        if remaining < k_pows[k - depth]:
             return None
         for a in factors.get(remaining, []):
             if a < k:
@@ -40,21 +43,39 @@ def find_multiset(n, k, factors):
                 return [a] + rest
         return None
 
-    return helper(n, 0)
+    result = helper(n, 0)
+    if stats is not None:
+        info = helper.cache_info()
+        # Every helper call visits a node, memoized or not
+        stats['dfs_nodes'] += info.hits + info.misses
+        stats['memo_hits'] += info.hits
+        stats['memo_misses'] += info.misses
+    return result
 
-def T_of(n, factors):
+def T_of(n, factors, stats=None):
     """
     Return T(n), the maximum k for which there exists a multiset of k factors ≥ k whose product is n.
+
+    Feasibility is monotone in k (merging two of k factors ≥ k leaves k-1
+    factors ≥ k-1), so we binary-search k in [1, max k with k^k ≤ n].
     """
     if n <= 1:
         return 1
-    max_k = int(math.log(n, 2)) + 1
-    for k in range(max_k, 1, -1):
-        if n < k ** k:
-            continue
-        if find_multiset(n, k, factors):
-            return k
-    return 1
+    hi = 1
+    while (hi + 1) ** (hi + 1) <= n:
+        hi += 1
+    lo = 1
+    if stats is not None:
+        stats['n_evaluated'] += 1
+    while lo < hi:
+        k = (lo + hi + 1) // 2
+        if stats is not None:
+            stats['k_levels_tried'] += 1
+        if find_multiset(n, k, factors, stats):
+            lo = k
+        else:
+            hi = k - 1
+    return lo
 
 def main():
     N_max = 1000000
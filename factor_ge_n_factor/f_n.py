@@ -4,6 +4,7 @@ Compute for each N ≤ N_max the largest multiset A of factors of N
 (such that product(A) = N and every a in A is ≥ |A|) and its size |A|.
 """
 
+import os
 import sys
 import math
 from functools import lru_cache
@@ -19,10 +20,11 @@ def build_factors(n_max):
             factors[j].append(i)
     return factors
 
-def find_multiset(n, k, factors):
+def find_multiset(n, k, factors, stats=None):
     """
     Try to find a multiset of exactly k factors (all ≥ k) whose product is n.
     Returns a list of factors if found; otherwise None.
+    If stats (a collections.Counter) is given, DFS nodes and memo hits/misses are added to it.
     """
     @lru_cache(None)
     def helper(remaining, depth):
@@ -43,9 +45,16 @@ def find_multiset(n, k, factors):
                 return [a] + res
         return None
 
-    return helper(n, 0)
+    result = helper(n, 0)
+    if stats is not None:
+        info = helper.cache_info()
+        # Every helper call visits a node, memoized or not
+        stats['dfs_nodes'] += info.hits + info.misses
+        stats['memo_hits'] += info.hits
+        stats['memo_misses'] += info.misses
+    return result
 
-def best_multiset_for(n, factors):
+def best_multiset_for(n, factors, stats=None):
     """
     For a given n, find the maximum k and one corresponding multiset A.
     """
@@ -53,26 +62,42 @@ def best_multiset_for(n, factors):
     max_k = int(math.log(n, 2)) + 1 if n > 1 else 1
     best_k = 1
     best_A = [n]  # trivial multiset
+    if stats is not None:
+        stats['n_evaluated'] += 1
     # Try from large k down to 1
     for k in range(max_k, 1, -1):
         if n < k ** k:
             continue
-        A = find_multiset(n, k, factors)
+        if stats is not None:
+            stats['k_levels_tried'] += 1
+        A = find_multiset(n, k, factors, stats)
         if A:
             best_k = k
             best_A = A
             break
     return best_k, sorted(best_A)
 
+def format_row(row):
+    n, k, A = row
+    return f"{n:6d}  {k:4d}  {A}\n"
+
 def main():
+    # The bounded-queue writer lives with the other output tools
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    '..', 'multiplicative_optimal_partitions'))
+    from background_writer import BackgroundWriter
+
     N_max = 2048
 
     factors = build_factors(N_max)
     print(f"{'N':>6}  {'T(N)':>4}  A")
     print("-" * 40)
-    for n in range(1, N_max + 1):
-        k, A = best_multiset_for(n, factors)
-        print(f"{n:6d}  {k:4d}  {A}")
+    sys.stdout.flush()
+    # Rows are formatted and written on the writer thread
+    with BackgroundWriter(sys.stdout, format_row, batch_size=4096) as writer:
+        for n in range(1, N_max + 1):
+            k, A = best_multiset_for(n, factors)
+            writer.write((n, k, A))
 
 if __name__ == "__main__":
     main()
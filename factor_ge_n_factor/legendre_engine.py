@@ -0,0 +1,284 @@
+"""
+One sieve pass, many Legendre-exponent statistics.
+
+constant_1.py, constant_2.py and constant_3.py share the same loop over
+the primes 2p ≤ N and differ only in the summand. Here the summands are
+vectorized NumPy callables f(p, vp, c) of
+
+    p   the primes of a segment (int64 array)
+    vp  v_p(N!) (int64 array)
+    c   ceil(log_p N), computed as in the constant scripts (int64 array)
+
+and every one of them is summed over the same segmented sieve pass.
+Integer results are exact; float results are summed per segment with
+numpy and the segment partials combined with math.fsum in segment order,
+so they do not depend on the number of workers the segments run on.
+
+constant_1.py, constant_2.py and constant_3.py compute L(N), M(N) and
+Y(N) through constant(), which sums only the summand it needs; with the
+numba backend the three standard sums run on the compiled segment
+kernel instead (parallel_constants.py).
+"""
+
+import argparse
+import math
+import os
+import time
+from multiprocessing import Pool
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+import legendre_kernels
+
+Summand = Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+
+def _floor_summand(p, vp, c):
+    return vp // c
+
+
+def _mod_summand(p, vp, c):
+    return vp % c
+
+
+def _weighted_mod_summand(p, vp, c):
+    return (vp % c) * np.log(p)
+
+
+# The summands of L(N), M(N) and Y(N); module-level functions so that
+# they can be sent to worker processes
+SUMMANDS: Dict[str, Summand] = {
+    'floor': _floor_summand,
+    'mod': _mod_summand,
+    'weighted_mod': _weighted_mod_summand,
+}
+
+
+def _base_primes(limit: int) -> np.ndarray:
+    """Return array of all primes ≤ limit via a Sieve of Eratosthenes."""
+    is_prime = np.ones(limit + 1, np.bool_)
+    is_prime[:2] = False
+    for i in range(2, math.isqrt(limit) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = False
+    return np.flatnonzero(is_prime)
+
+
+def _segment_primes(lo: int, hi: int, base: np.ndarray) -> np.ndarray:
+    """Primes in [lo, hi) given the primes up to sqrt(hi)."""
+    is_prime = np.ones(hi - lo, np.bool_)
+    if lo < 2:
+        is_prime[:2 - lo] = False
+    for p in base:
+        p = int(p)
+        if p * p >= hi:
+            break
+        start = max(p * p, ((lo + p - 1) // p) * p)
+        is_prime[start - lo::p] = False
+    return np.flatnonzero(is_prime) + lo
+
+
+def v_p_factorial(N: int, p: np.ndarray) -> np.ndarray:
+    """Exponent of each prime p in N! (Legendre's formula), vectorized."""
+    q = N // p
+    vp = q.copy()
+    active = np.flatnonzero(q)
+    while active.size:
+        q_active = q[active] // p[active]
+        q[active] = q_active
+        vp[active] += q_active
+        active = active[q_active > 0]
+    return vp
+
+
+def _segment_statistics(N: int, lo: int, hi: int, base: np.ndarray,
+                        summands: Dict[str, Summand]) -> Dict[str, float]:
+    """{name: sum over the primes in [lo, hi)} (ints for integer summands)."""
+    p = _segment_primes(lo, hi, base)
+    if p.size == 0:
+        return {}
+    vp = v_p_factorial(N, p)
+    c = np.ceil(math.log(N) / np.log(p)).astype(np.int64)
+    partials = {}
+    for name, summand in summands.items():
+        values = np.asarray(summand(p, vp, c))
+        if np.issubdtype(values.dtype, np.integer):
+            partials[name] = int(values.sum())
+        else:
+            partials[name] = float(values.sum())
+    return partials
+
+
+_worker_state = {}
+
+
+def _init_worker(N: int, base: np.ndarray, summands: Dict[str, Summand]):
+    _worker_state.update(N=N, base=base, summands=summands)
+
+
+def _run_segment(bounds: Tuple[int, int]) -> Dict[str, float]:
+    state = _worker_state
+    return _segment_statistics(state['N'], bounds[0], bounds[1], state['base'], state['summands'])
+
+
+def legendre_statistics(N: int, summands: Dict[str, Summand] = SUMMANDS, segment_size: int = 1 << 22,
+                        workers: Optional[int] = 1, timings: Optional[Dict] = None) -> Dict[str, float]:
+    """Sum every summand over the primes 2p ≤ N in one segmented pass.
+
+    Segments run on `workers` processes (None: one per CPU). Returns
+    {name: sum}; integer summands give Python ints.
+    """
+    t0 = time.perf_counter()
+    limit = N // 2
+    base = _base_primes(math.isqrt(limit))
+    segments = [(lo, min(lo + segment_size, limit + 1)) for lo in range(2, limit + 1, segment_size)]
+    t1 = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        partials = (_segment_statistics(N, lo, hi, base, summands) for lo, hi in segments)
+        results = _fold(summands, partials)
+    else:
+        with Pool(workers, _init_worker, (N, base, summands)) as pool:
+            # imap yields in segment order, so float partials are folded deterministically
+            results = _fold(summands, pool.imap(_run_segment, segments))
+
+    if timings is not None:
+        timings['sieve'] = t1 - t0
+        timings['summation'] = time.perf_counter() - t1
+    return results
+
+
+def _fold(summands: Dict[str, Summand], partials) -> Dict[str, float]:
+    """Add up per-segment results: exact for ints, math.fsum for floats."""
+    int_totals = {}
+    float_partials = {}
+    for segment in partials:
+        for name, value in segment.items():
+            if isinstance(value, int):
+                int_totals[name] = int_totals.get(name, 0) + value
+            else:
+                float_partials.setdefault(name, []).append(value)
+    results = {}
+    for name in summands:
+        if name in float_partials:
+            results[name] = math.fsum(float_partials[name])
+        else:
+            results[name] = int_totals.get(name, 0)
+    return results
+
+
+# The summand each constant is built from
+CONSTANT_SUMMANDS = {'L': 'floor', 'M': 'mod', 'Y': 'weighted_mod'}
+
+
+def _constant_from_sum(name: str, N: int, total: float) -> float:
+    lnlnN = math.log(math.log(N))
+    if name == 'L':
+        return lnlnN * (1 - total / N)
+    if name == 'M':
+        return lnlnN ** 2 * total / N
+    return total / N
+
+
+def _constants_from_sums(N: int, floor_sum: int, mod_sum: int, weighted_sum: float) -> Dict[str, float]:
+    sums = {'L': floor_sum, 'M': mod_sum, 'Y': weighted_sum}
+    return {name: _constant_from_sum(name, N, total) for name, total in sums.items()}
+
+
+def constants(N: int, segment_size: int = 1 << 22, workers: Optional[int] = 1,
+              backend=None, timings: Optional[Dict] = None) -> Dict[str, float]:
+    """L(N), M(N) and Y(N) (as in constant_1/2/3.py) from one pass.
+
+    backend (or OEIS_BACKEND) 'numba' runs the three sums on the compiled
+    segment kernel; 'python' evaluates SUMMANDS with NumPy.
+    """
+    if legendre_kernels.resolve_backend(backend) == 'numba':
+        import parallel_constants
+        sums = parallel_constants.parallel_sums(N, workers, segment_size, timings)
+    else:
+        totals = legendre_statistics(N, SUMMANDS, segment_size, workers, timings)
+        sums = totals['floor'], totals['mod'], totals['weighted_mod']
+    return _constants_from_sums(N, *sums)
+
+
+def constant(name: str, N: int, segment_size: int = 1 << 22, workers: Optional[int] = 1,
+             backend=None, timings: Optional[Dict] = None) -> float:
+    """L(N), M(N) or Y(N) alone.
+
+    The python backend sums only the summand of that constant; the numba
+    kernel gets all three sums from the same per-prime loop, so it runs
+    as in constants().
+    """
+    if legendre_kernels.resolve_backend(backend) == 'numba':
+        return constants(N, segment_size, workers, backend, timings)[name]
+    summand = CONSTANT_SUMMANDS[name]
+    totals = legendre_statistics(N, {summand: SUMMANDS[summand]}, segment_size, workers, timings)
+    return _constant_from_sum(name, N, totals[summand])
+
+
+class ExpressionSummand:
+    """Summand given as an expression in p, vp, c and np, e.g. '(vp % c)**2'.
+
+    Kept as source text (compiled on first use) so it can be sent to
+    worker processes.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self._code = None
+
+    def __call__(self, p, vp, c):
+        if self._code is None:
+            self._code = compile(self.expression, f"<summand {self.expression}>", 'eval')
+        return eval(self._code, {'np': np}, {'p': p, 'vp': vp, 'c': c})
+
+    def __getstate__(self):
+        return {'expression': self.expression, '_code': None}
+
+
+def parse_summand(spec: str):
+    """'name=expression' in p, vp, c and np, e.g. 'sq=(vp % c)**2'."""
+    name, _, expression = spec.partition('=')
+    if not expression:
+        raise argparse.ArgumentTypeError(f"Expected name=expression, got {spec!r}")
+    summand = ExpressionSummand(expression)
+    try:
+        compile(expression, f"<summand {name}>", 'eval')
+    except SyntaxError as exc:
+        raise argparse.ArgumentTypeError(f"Invalid summand expression {expression!r}: {exc}")
+    return name.strip(), summand
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legendre-exponent statistics in one sieve pass.")
+    parser.add_argument("N", type=int)
+    parser.add_argument("--summand", type=parse_summand, action="append", default=[],
+                        help="extra statistic as name=expression in p, vp, c and np")
+    parser.add_argument("--segment-size", type=int, default=1 << 22)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0: one per CPU)")
+    parser.add_argument("--backend", choices=legendre_kernels.BACKENDS + ('auto',), default=None,
+                        help="backend for L, M and Y (not with --summand, which always uses NumPy)")
+    args = parser.parse_args()
+    if args.summand and args.backend:
+        parser.error("--backend cannot be combined with --summand: custom summands run on NumPy")
+
+    timings = {}
+    if args.summand:
+        # Extra statistics share the NumPy pass with the three standard sums
+        summands = dict(SUMMANDS)
+        summands.update(args.summand)
+        sums = legendre_statistics(args.N, summands, args.segment_size, args.workers, timings)
+        values = _constants_from_sums(args.N, sums['floor'], sums['mod'], sums['weighted_mod'])
+    else:
+        values = constants(args.N, args.segment_size, args.workers, args.backend, timings)
+    for name, value in values.items():
+        print(f"{name}({args.N}) = {value!r}")
+    for name, _ in args.summand:
+        print(f"sum {name} = {sums[name]!r}")
+    print(f"Base sieve: {timings['sieve']:.2f} s, segments: {timings['summation']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
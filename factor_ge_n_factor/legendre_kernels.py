@@ -0,0 +1,142 @@
+"""
+Optional JIT-compiled kernel for the Legendre-exponent sums behind
+constant_1.py, constant_2.py and constant_3.py.
+
+With Numba installed (and OEIS_BACKEND unset, 'auto' or 'numba')
+legendre_engine.constants runs the three sums on _segment_sums_kernel,
+one sieve segment at a time (parallel_constants.py spreads the segments
+over processes); otherwise it evaluates the same sums with NumPy.
+`python legendre_kernels.py --check-parity` compares both backends on
+fixed N.
+"""
+
+import argparse
+import importlib.util
+import math
+import os
+import sys
+
+
+def _load_numba_backend():
+    """The shared numba_backend module of multiplicative_optimal_partitions,
+    loaded by path so that sys.path is left alone."""
+    if 'numba_backend' in sys.modules:
+        return sys.modules['numba_backend']
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                        'multiplicative_optimal_partitions', 'numba_backend.py')
+    spec = importlib.util.spec_from_file_location('numba_backend', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['numba_backend'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+numba_backend = _load_numba_backend()
+numba, np = numba_backend.numba, numba_backend.np
+NUMBA_AVAILABLE = numba_backend.NUMBA_AVAILABLE
+BACKENDS = numba_backend.BACKENDS
+resolve_backend = numba_backend.resolve_backend
+
+# Fixed N for --check-parity
+PARITY_N = (10 ** 5, 10 ** 6, 3 * 10 ** 6)
+
+# Y is a float sum whose rounding depends on the summation order of each
+# backend; L and M are exact integer sums
+Y_TOLERANCE = 1e-12
+
+
+def _v_p_factorial(N, p):
+    """Exponent of prime p in N! via repeated division."""
+    e = 0
+    while N:
+        N //= p
+        e += N
+    return e
+
+
+def _segment_sums_kernel(N, lo, hi, primes):
+    """(floor_sum, mod_sum, weighted_sum, compensation) over the primes in [lo, hi).
+
+    primes holds the base primes up to sqrt(hi); c = ceil(log_p N) and the
+    ln(p)-weighted sum is Kahan-compensated.
+    """
+    is_comp = np.zeros(hi - lo, np.bool_)
+    for p in primes:
+        if p * p >= hi:
+            break
+        start = max(p * p, ((lo + p - 1) // p) * p)
+        for j in range(start, hi, p):
+            is_comp[j - lo] = True
+    lnN = math.log(N)
+    floor_sum = 0
+    mod_sum = 0
+    weighted_sum = 0.0
+    compensation = 0.0
+    for i in range(hi - lo):
+        p = lo + i
+        if p < 2 or is_comp[i]:
+            continue
+        vp = _v_p_factorial(N, p)
+        ceil_log_p = math.ceil(lnN / math.log(p))
+        floor_sum += vp // ceil_log_p
+        mod_sum += vp % ceil_log_p
+        term = (vp % ceil_log_p) * math.log(p) - compensation
+        total = weighted_sum + term
+        compensation = (total - weighted_sum) - term
+        weighted_sum = total
+    return floor_sum, mod_sum, weighted_sum, compensation
+
+
+if NUMBA_AVAILABLE:
+    _v_p_factorial = numba.njit(cache=True)(_v_p_factorial)
+    _segment_sums_kernel = numba.njit(cache=True)(_segment_sums_kernel)
+
+
+def _compare_constants(N) -> bool:
+    from constant_1 import L_of_N
+    from constant_2 import M_of_N
+    from constant_3 import Y_of_N
+
+    ok = True
+    for name, f in (("L", L_of_N), ("M", M_of_N), ("Y", Y_of_N)):
+        expected = f(N, backend='python')
+        actual = f(N, backend='numba')
+        tolerance = Y_TOLERANCE * abs(expected) if name == "Y" else 0.0
+        if abs(expected - actual) > tolerance:
+            print(f"Mismatch for {name}({N}): python {expected!r}, numba {actual!r}")
+            ok = False
+        else:
+            print(f"{name}({N}) = {expected!r} on both backends")
+    return ok
+
+
+def check_parity(values=PARITY_N):
+    """Compare L, M and Y between the python and numba backends at each N in values.
+
+    Returns None (skipped) when numba is not installed.
+    """
+    return numba_backend.check_parity(values, _compare_constants)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legendre-sum kernel with an optional Numba backend.")
+    parser.add_argument("N", type=int, nargs="?", default=None, help="default 10^5")
+    parser.add_argument("--check-parity", action="store_true",
+                        help="compare the python and numba backends at N, "
+                             "or at the fixed PARITY_N when N is not given")
+    args = parser.parse_args()
+
+    if args.check_parity:
+        numba_backend.exit_with_parity(check_parity(PARITY_N if args.N is None else [args.N]))
+
+    import legendre_engine
+
+    N = 10 ** 5 if args.N is None else args.N
+    backend = resolve_backend()
+    print(f"Backend: {backend}")
+    for name, value in legendre_engine.constants(N, backend=backend).items():
+        print(f"{name}({N}) = {value!r}")
+
+
+if __name__ == "__main__":
+    main()
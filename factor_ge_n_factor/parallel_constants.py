@@ -0,0 +1,91 @@
+"""
+The L(N), M(N) and Y(N) sums on the compiled kernel, over parallel
+prime segments.
+
+The prime range [2, N/2] is cut into fixed segments. Each worker sieves
+its segments with the shared base primes up to sqrt(N/2) and runs
+legendre_kernels._segment_sums_kernel on them; all three sums come from
+the same per-prime loop. The integer sums are exact. The ln(p)-weighted
+sum of Y(N) is Kahan-compensated within a segment and the segment
+partials are combined with math.fsum in segment order, so the result
+depends on the segment size but not on the number of workers.
+
+This is the numba backend of legendre_engine.constants; requires Numba.
+"""
+
+import math
+import os
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+import legendre_kernels
+
+if legendre_kernels.NUMBA_AVAILABLE:
+    import numpy as np
+
+
+def base_primes(limit: int) -> List[int]:
+    """Return list of all primes ≤ limit via a Sieve of Eratosthenes."""
+    is_comp = bytearray(limit + 1)
+    primes = []
+    for i in range(2, limit + 1):
+        if not is_comp[i]:
+            primes.append(i)
+            start = i * i
+            if start <= limit:
+                is_comp[start::i] = b'\x01' * (((limit - start) // i) + 1)
+    return primes
+
+
+_worker_state = {}
+
+
+def _init_worker(primes):
+    _worker_state['primes'] = primes
+
+
+def _run_segment(task) -> Tuple[int, int, float, float]:
+    N, lo, hi = task
+    f, m, w, c = legendre_kernels._segment_sums_kernel(N, lo, hi, _worker_state['primes'])
+    return int(f), int(m), float(w), float(c)
+
+
+def parallel_sums(N: int, workers: Optional[int] = None, segment_size: int = 10 ** 7,
+                  timings: Optional[Dict] = None) -> Tuple[int, int, float]:
+    """(floor_sum, mod_sum, weighted_mod_sum) over 2p ≤ N, computed in parallel segments.
+
+    workers=None uses one process per CPU; workers=1 runs in this process.
+    """
+    legendre_kernels.resolve_backend('numba')
+    t0 = time.perf_counter()
+    limit = N // 2
+    primes = np.array(base_primes(math.isqrt(limit)), np.int64)
+    tasks = [(N, lo, min(lo + segment_size, limit + 1))
+             for lo in range(2, limit + 1, segment_size)]
+    t1 = time.perf_counter()
+
+    floor_sum = 0
+    mod_sum = 0
+    partials = []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(primes)
+        results = map(_run_segment, tasks)
+        pool = None
+    else:
+        pool = Pool(workers, _init_worker, (primes,))
+        # imap yields in task order, so the partials are folded deterministically
+        results = pool.imap(_run_segment, tasks)
+    try:
+        for f, m, w, c in results:
+            floor_sum += f
+            mod_sum += m
+            partials.extend((w, -c))
+    finally:
+        if pool is not None:
+            pool.terminate()
+    if timings is not None:
+        timings['sieve'] = t1 - t0
+        timings['summation'] = time.perf_counter() - t1
+    return floor_sum, mod_sum, math.fsum(partials)
@@ -0,0 +1,104 @@
+"""
+Background output stage for large result files.
+
+Rows are collected into batches on the computing thread and handed to a
+writer thread through a bounded queue, so formatting and I/O overlap with
+computation. When the queue is full, write() blocks until the writer
+catches up (backpressure); close() flushes the partial batch and waits
+for everything to reach the file. The target is a file name or an open
+text stream such as sys.stdout (which is flushed but left open).
+"""
+
+import queue
+import threading
+from typing import Callable, Iterable, Optional, TextIO, Union
+
+
+def csv_row(row) -> str:
+    """Default formatter: comma-separated fields terminated by a newline."""
+    return ",".join(map(str, row)) + "\n"
+
+
+class BackgroundWriter:
+    _SENTINEL = None
+
+    def __init__(self, filename: Union[str, TextIO], formatter: Callable = csv_row,
+                 header: Optional[str] = None, batch_size: int = 10000,
+                 max_pending_batches: int = 4):
+        self._owns_file = isinstance(filename, str)
+        self.filename = filename if self._owns_file else getattr(filename, 'name', repr(filename))
+        self.formatter = formatter
+        self.batch_size = batch_size
+        self.rows_written = 0
+
+        self._batch = []
+        self._queue = queue.Queue(maxsize=max_pending_batches)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._file = open(filename, 'w') if self._owns_file else filename
+        if header is not None:
+            self._file.write(header if header.endswith("\n") else header + "\n")
+        self._thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                batch = self._queue.get()
+                if batch is self._SENTINEL:
+                    break
+                self._file.write("".join(map(self.formatter, batch)))
+                self.rows_written += len(batch)
+        except BaseException as exc:
+            self._error = exc
+            # Keep draining so a blocked producer can reach close()
+            while self._queue.get() is not self._SENTINEL:
+                pass
+        finally:
+            if self._owns_file:
+                self._file.close()
+            else:
+                self._file.flush()
+
+    def _put(self, item):
+        while True:
+            if self._error is not None:
+                raise RuntimeError(f"Background writer for {self.filename} failed") from self._error
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, row):
+        """Queue one row; blocks while max_pending_batches batches are waiting."""
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self._put(self._batch)
+            self._batch = []
+
+    def write_rows(self, rows: Iterable):
+        for row in rows:
+            self.write(row)
+
+    def close(self):
+        """Flush the partial batch, stop the writer thread and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._batch:
+                self._put(self._batch)
+                self._batch = []
+        finally:
+            self._queue.put(self._SENTINEL)
+            self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Background writer for {self.filename} failed") from self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
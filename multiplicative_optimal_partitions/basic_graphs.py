@@ -1,18 +1,63 @@
-import numpy as np
-import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
 from functools import lru_cache
-from typing import List, Dict
+from typing import List, Dict, Optional
 import math
 from collections import defaultdict
+from instrumentation import Instrumentation, stage_of, timed_stage
+
+def _load_pyplot():
+    """Import matplotlib.pyplot on first use.
+    
+    Compute-only runs never pay for the import. Plots are only saved to
+    files, so without a display or an explicit MPLBACKEND the headless Agg
+    backend is selected.
+    """
+    if 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        if not os.environ.get('MPLBACKEND') and not os.environ.get('DISPLAY'):
+            matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def level_bands(max_n: int) -> List[tuple]:
+    """Split [1, max_n] into bands (k, lo, hi) with lo..hi inside [k^k, (k+1)^(k+1)).
+    
+    P_π(n) >= k needs n >= k^k, so every n in band k has P_π(n) <= k.
+    """
+    bands = []
+    k = 1
+    lo = 1
+    while lo <= max_n:
+        hi = min((k + 1) ** (k + 1) - 1, max_n)
+        bands.append((k, lo, hi))
+        lo = hi + 1
+        k += 1
+    return bands
 
 class PartitionAnalyzer:
-    def __init__(self, max_n: int = 1000):
+    def __init__(self, max_n: int = 1000, instrumentation: Optional[Instrumentation] = None,
+                 backend: Optional[str] = None):
         self.max_n = max_n
+        self.instrumentation = instrumentation
+        # backend ('python', 'numba' or 'auto') is resolved once; only
+        # 'numba' sends partition_function to the compiled partition_kernels,
+        # 'python' and None keep the exhaustive search below
+        self.backend = None
+        if backend is not None:
+            from numba_backend import resolve_backend
+            self.backend = resolve_backend(backend)
+        if self.backend == 'numba':
+            import partition_kernels
+            self._kernel_partition_value = partition_kernels.partition_value
+            self._kernel_can_partition = partition_kernels.can_partition
         self.partition_values = {}
         self.decrease_seq = []
         self.increase_seq = []
         self.equality_seq = []
         self.level_frequencies = defaultdict(lambda: {'decrease': 0, 'increase': 0, 'equality': 0})
+        self.band_stats = []
         
     @lru_cache(maxsize=None)
     def get_divisors(self, n: int) -> List[int]:
@@ -44,6 +89,9 @@ class PartitionAnalyzer:
     
     def _recursive_partition_check(self, remaining: int, factors_left: int, min_factor: int) -> bool:
         """Recursively check if remaining can be partitioned."""
+        if self.instrumentation is not None:
+            self.instrumentation.count('dfs_nodes')
+        
         if factors_left == 0:
             return remaining == 1
         
@@ -66,7 +114,14 @@ class PartitionAnalyzer:
     @lru_cache(maxsize=None)
     def partition_function(self, n: int) -> int:
         """Calculate P_π(n)."""
+        if self.backend == 'numba':
+            if self.instrumentation is not None:
+                self.instrumentation.count('n_evaluated')
+            return self._kernel_partition_value(n, self.backend)
+
         if n == 1:
+            if self.instrumentation is not None:
+                self.instrumentation.count('n_evaluated')
             return 1
         
         max_k = 1
@@ -77,33 +132,131 @@ class PartitionAnalyzer:
                 max_k = k
             k += 1
         
+        if self.instrumentation is not None:
+            self.instrumentation.count('n_evaluated')
+            self.instrumentation.count('k_levels_tried', k - 1)
+        
         return max_k
     
     def compute_all_values(self):
         """Compute partition function values and sequences."""
         print(f"Computing partition function for n = 1 to {self.max_n}...")
-        
-        for n in range(1, self.max_n + 1):
-            if n % 100 == 0:
-                print(f"Progress: {n}/{self.max_n}")
-            self.partition_values[n] = self.partition_function(n)
-        
-        for m in range(1, self.max_n):
-            p_m = self.partition_values[m]
-            p_m_plus_1 = self.partition_values[m + 1]
-            
-            if p_m > p_m_plus_1:
-                self.decrease_seq.append(m)
-                self.level_frequencies[p_m]['decrease'] += 1
-            elif p_m < p_m_plus_1:
-                self.increase_seq.append(m)
-                self.level_frequencies[p_m]['increase'] += 1
+        instr = self.instrumentation
+        
+        with stage_of(instr, 'value_computation'):
+            for n in range(1, self.max_n + 1):
+                if instr is not None:
+                    instr.observe(n)
+                elif n % 10000 == 0:
+                    print(f"Progress: {n}/{self.max_n}")
+                self.partition_values[n] = self.partition_function(n)
+        
+        with stage_of(instr, 'classification'):
+            for m in range(1, self.max_n):
+                p_m = self.partition_values[m]
+                p_m_plus_1 = self.partition_values[m + 1]
+                
+                if p_m > p_m_plus_1:
+                    self.decrease_seq.append(m)
+                    self.level_frequencies[p_m]['decrease'] += 1
+                elif p_m < p_m_plus_1:
+                    self.increase_seq.append(m)
+                    self.level_frequencies[p_m]['increase'] += 1
+                else:
+                    self.equality_seq.append(m)
+                    self.level_frequencies[p_m]['equality'] += 1
+        
+        if instr is not None:
+            instr.finish()
+            instr.record_cache('partition_function', self.partition_function.cache_info())
+            instr.record_cache('get_divisors', self.get_divisors.cache_info())
+    
+    def banded_partition_value(self, n: int, top_level: int) -> int:
+        """P_π(n) for n whose band allows at most top_level.
+        
+        Feasibility is monotone in k, so the levels are tried from the top
+        down and the first feasible one is the answer. With the numba
+        backend each level is checked by the compiled kernel.
+        """
+        for k in range(top_level, 1, -1):
+            if self.instrumentation is not None:
+                self.instrumentation.count('k_levels_tried')
+            if self.backend == 'numba':
+                feasible = self._kernel_can_partition(n, k, 'numba')
             else:
-                self.equality_seq.append(m)
-                self.level_frequencies[p_m]['equality'] += 1
+                feasible = self.can_partition_with_k_factors(n, k)
+            if feasible:
+                return k
+        return 1
+    
+    def compute_banded(self, report: bool = True):
+        """Compute values, sequences and level frequencies band by band.
+        
+        Per-band level counts and transition statistics are collected in
+        self.band_stats (and printed) as soon as each band's last
+        transition is known, in the same pass as the values.
+        """
+        print(f"Computing partition function for n = 1 to {self.max_n} by level bands...")
+        instr = self.instrumentation
+        bands = level_bands(self.max_n)
+        band_of_m = None
+        
+        def new_band(k, lo, hi):
+            return {'k': k, 'lo': lo, 'hi': hi, 'levels': defaultdict(int),
+                    'transitions': {'decrease': 0, 'increase': 0, 'equality': 0},
+                    'level_transitions': defaultdict(lambda: {'decrease': 0, 'increase': 0, 'equality': 0})}
+        
+        def close_band(stats):
+            self.band_stats.append(stats)
+            if report:
+                levels = ", ".join(f"{level}: {count}" for level, count in sorted(stats['levels'].items()))
+                t = stats['transitions']
+                print(f"Band k={stats['k']} [{stats['lo']}, {stats['hi']}]: levels {{{levels}}}; "
+                      f"decrease={t['decrease']}, increase={t['increase']}, equality={t['equality']}")
+        
+        with stage_of(instr, 'value_computation'):
+            for k, lo, hi in bands:
+                stats = new_band(k, lo, hi)
+                for n in range(lo, hi + 1):
+                    if instr is not None:
+                        instr.observe(n)
+                        instr.count('n_evaluated')
+                    p_n = 1 if n == 1 else self.banded_partition_value(n, k)
+                    self.partition_values[n] = p_n
+                    stats['levels'][p_n] += 1
+                    
+                    # Classify m = n - 1, which may be the last n of the previous band
+                    m = n - 1
+                    if m >= 1:
+                        p_m = self.partition_values[m]
+                        target = stats if m >= lo else band_of_m
+                        if p_m > p_n:
+                            seq_type = 'decrease'
+                            self.decrease_seq.append(m)
+                        elif p_m < p_n:
+                            seq_type = 'increase'
+                            self.increase_seq.append(m)
+                        else:
+                            seq_type = 'equality'
+                            self.equality_seq.append(m)
+                        self.level_frequencies[p_m][seq_type] += 1
+                        target['transitions'][seq_type] += 1
+                        target['level_transitions'][p_m][seq_type] += 1
+                        if target is band_of_m:
+                            close_band(band_of_m)
+                band_of_m = stats
+            if band_of_m is not None:
+                # P_π(max_n + 1) is not computed, so max_n itself stays unclassified
+                close_band(band_of_m)
+        
+        if instr is not None:
+            instr.finish()
+            instr.record_cache('get_divisors', self.get_divisors.cache_info())
     
+    @timed_stage('plotting')
     def plot_partition_function(self):
         """Plot the partition function with marked transition points."""
+        plt = _load_pyplot()
         n_values = list(range(1, self.max_n + 1))
         p_values = [self.partition_values[n] for n in n_values]
         
@@ -133,11 +286,15 @@ class PartitionAnalyzer:
         plt.savefig('partition_function.png', dpi=300, bbox_inches='tight')
         plt.close()
     
+    @timed_stage('plotting')
     def plot_level_frequencies(self):
         """Plot frequency bar chart for each partition function level."""
         if not self.level_frequencies:
             return
         
+        import numpy as np
+        plt = _load_pyplot()
+        
         levels = sorted(self.level_frequencies.keys())
         decrease_counts = [self.level_frequencies[level]['decrease'] for level in levels]
         increase_counts = [self.level_frequencies[level]['increase'] for level in levels]
@@ -177,11 +334,13 @@ class PartitionAnalyzer:
         plt.savefig('level_frequencies.png', dpi=300, bbox_inches='tight')
         plt.close()
     
+    @timed_stage('plotting')
     def plot_decrease_sequence(self):
         """Plot the decrease sequence with ratios."""
         if not self.decrease_seq:
             return
         
+        plt = _load_pyplot()
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
         
         j_values = list(range(1, len(self.decrease_seq) + 1))
@@ -200,11 +359,13 @@ class PartitionAnalyzer:
         plt.savefig('decrease_sequence.png', dpi=300, bbox_inches='tight')
         plt.close()
     
+    @timed_stage('plotting')
     def plot_increase_sequence(self):
         """Plot the increase sequence with ratios."""
         if not self.increase_seq:
             return
         
+        plt = _load_pyplot()
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
         
         j_values = list(range(1, len(self.increase_seq) + 1))
@@ -223,11 +384,13 @@ class PartitionAnalyzer:
         plt.savefig('increase_sequence.png', dpi=300, bbox_inches='tight')
         plt.close()
     
+    @timed_stage('plotting')
     def plot_equality_sequence(self):
         """Plot the equality sequence with ratios."""
         if not self.equality_seq:
             return
         
+        plt = _load_pyplot()
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
         
         j_values = list(range(1, len(self.equality_seq) + 1))
@@ -267,30 +430,53 @@ class PartitionAnalyzer:
             total = freq['decrease'] + freq['increase'] + freq['equality']
             print(f"P_π(n) = {level}: Decrease={freq['decrease']}, Increase={freq['increase']}, Equality={freq['equality']}, Total={total}")
 
-def main():
-    max_n = 10000  # Adjust based on computational resources
-    
-    analyzer = PartitionAnalyzer(max_n)
-    analyzer.compute_all_values()
-    
-    # Generate all individual image files
-    print("\nGenerating graphs...")
-    analyzer.plot_partition_function()
-    print("Generated: partition_function.png")
-    
-    analyzer.plot_level_frequencies()
-    print("Generated: level_frequencies.png")
-    
-    analyzer.plot_decrease_sequence()
-    print("Generated: decrease_sequence.png")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compute and plot P_π(n) and its local behavior sequences.")
+    parser.add_argument("--max-n", type=int, default=10000,
+                        help="compute P_π(n) for n = 1..max_n (default: 10000)")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="headless run: compute and print statistics only (matplotlib is never imported)")
+    parser.add_argument("--banded", action="store_true",
+                        help="compute band by band over [k^k, (k+1)^(k+1)), reporting each band as it completes")
+    parser.add_argument("--backend", choices=("python", "numba", "auto"), default=None,
+                        help="numba computes P_π(n) with the compiled partition_kernels; "
+                             "python, or no flag, keeps the exhaustive search (auto: numba if installed)")
+    parser.add_argument("--instrument-json", default=None,
+                        help="enable instrumentation and export it to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     
-    analyzer.plot_increase_sequence()
-    print("Generated: increase_sequence.png")
+    instrumentation = Instrumentation() if args.instrument_json else None
+    analyzer = PartitionAnalyzer(args.max_n, instrumentation, args.backend)
+    if args.banded:
+        analyzer.compute_banded()
+    else:
+        analyzer.compute_all_values()
     
-    analyzer.plot_equality_sequence()
-    print("Generated: equality_sequence.png")
+    if not args.no_plots:
+        # Generate all individual image files
+        print("\nGenerating graphs...")
+        analyzer.plot_partition_function()
+        print("Generated: partition_function.png")
+        
+        analyzer.plot_level_frequencies()
+        print("Generated: level_frequencies.png")
+        
+        analyzer.plot_decrease_sequence()
+        print("Generated: decrease_sequence.png")
+        
+        analyzer.plot_increase_sequence()
+        print("Generated: increase_sequence.png")
+        
+        analyzer.plot_equality_sequence()
+        print("Generated: equality_sequence.png")
     
     analyzer.print_statistics()
+    
+    if instrumentation is not None:
+        instrumentation.export_json(args.instrument_json)
 
 if __name__ == "__main__":
     main()
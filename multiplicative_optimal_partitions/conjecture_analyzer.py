@@ -1,30 +1,138 @@
-import numpy as np
-import matplotlib.pyplot as plt
+import argparse
+import bisect
+import shutil
+import tempfile
 from functools import lru_cache
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import math
 import random
 from collections import defaultdict
+from instrumentation import Instrumentation, stage_of, timed_stage
+from background_writer import BackgroundWriter
+from segment_store import SegmentedArray
+
+SEQUENCE_TYPES = ('decrease', 'equality', 'increase')
+
+# Rough size of one lru_cache entry of partition_function (key, value, links)
+_CACHE_ENTRY_BYTES = 160
+
+
+def parse_memory_size(text: str) -> int:
+    """Parse '512M', '4G' or a plain number of bytes."""
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def classify_transition(p_m: int, p_m_plus_1: int) -> str:
+    """Classify m by comparing P_π(m) with P_π(m+1)."""
+    if p_m > p_m_plus_1:
+        return 'decrease'
+    elif p_m < p_m_plus_1:
+        return 'increase'
+    return 'equality'
+
+
+class OnlineConjectureStatistics:
+    """Streaming j_M and C accumulators fed as each m is classified.
+
+    Only the running counts and the last term of each sequence are kept,
+    so the memory used is O(#checkpoints) instead of O(max_n).
+    """
+
+    def __init__(self, checkpoints: List[int]):
+        self.checkpoints = sorted(set(checkpoints))
+        self.counts = {'decrease': 0, 'equality': 0, 'increase': 0}
+        self.last_terms = {'decrease': 0, 'equality': 0, 'increase': 0}
+        self.results = []
+        self._next_checkpoint = 0
+
+    def _flush_checkpoints(self, upto: int):
+        """Record every pending checkpoint M <= upto."""
+        while (self._next_checkpoint < len(self.checkpoints)
+               and self.checkpoints[self._next_checkpoint] <= upto):
+            self.results.append(self.snapshot(self.checkpoints[self._next_checkpoint]))
+            self._next_checkpoint += 1
+
+    def update(self, m: int, seq_type: str):
+        """Feed the classification of m (m must be non-decreasing)."""
+        self._flush_checkpoints(m - 1)
+        self.counts[seq_type] += 1
+        self.last_terms[seq_type] = m
+        self._flush_checkpoints(m)
+
+    def snapshot(self, M: int) -> Dict:
+        """Conjecture values for the terms fed so far, reported at M."""
+        j_minus_M = self.counts['decrease']
+        j_zero_M = self.counts['equality']
+        j_plus_M = self.counts['increase']
+        d_j_minus = self.last_terms['decrease']
+        e_j_zero = self.last_terms['equality']
+        i_j_plus = self.last_terms['increase']
+
+        C_minus = j_minus_M / d_j_minus if d_j_minus > 0 else 0
+        C_zero = j_zero_M / e_j_zero if e_j_zero > 0 else 0
+        C_plus = j_plus_M / i_j_plus if i_j_plus > 0 else 0
+
+        # |1 - (2C^(±) + C^(0))| for each side of the conjecture
+        if C_minus > 0 and C_zero > 0:
+            residual_minus = abs(1 - (2 * C_minus + C_zero))
+        else:
+            residual_minus = float('nan')
+        if C_plus > 0 and C_zero > 0:
+            residual_plus = abs(1 - (2 * C_plus + C_zero))
+        else:
+            residual_plus = float('nan')
+
+        return {
+            'M': M,
+            'j_minus_M': j_minus_M,
+            'd_j_minus': d_j_minus,
+            'j_zero_M': j_zero_M,
+            'e_j_zero': e_j_zero,
+            'j_plus_M': j_plus_M,
+            'i_j_plus': i_j_plus,
+            'C_minus': C_minus,
+            'C_zero': C_zero,
+            'C_plus': C_plus,
+            'diff_minus': abs(M - d_j_minus) if d_j_minus > 0 else float('inf'),
+            'diff_zero': abs(M - e_j_zero) if e_j_zero > 0 else float('inf'),
+            'diff_plus': abs(M - i_j_plus) if i_j_plus > 0 else float('inf'),
+            'residual_minus': residual_minus,
+            'residual_plus': residual_plus
+        }
+
 
 class StatisticalConjectureAnalyzer:
-    def __init__(self, max_n: int = 1000000):
+    def __init__(self, max_n: int = 1000000, instrumentation: Optional[Instrumentation] = None,
+                 memory_budget: Optional[int] = None, spill_dir: Optional[str] = None,
+                 backend: Optional[str] = None):
         self.max_n = max_n
+        self.instrumentation = instrumentation
+        # backend ('python', 'numba' or 'auto') is resolved once; only
+        # 'numba' sends partition_function to the compiled partition_kernels,
+        # 'python' and None keep the exhaustive search below
+        self.backend = None
+        if backend is not None:
+            from numba_backend import resolve_backend
+            self.backend = resolve_backend(backend)
+        if self.backend == 'numba':
+            import partition_kernels
+            self._kernel_partition_value = partition_kernels.partition_value
+        # With a memory budget (bytes) values and sequences are spilled to
+        # memory-mapped segments in spill_dir and the caches are bounded
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        # A spill directory created here (not passed in) is removed by close()
+        self._owns_spill_dir = False
+        self.cache_evictions = 0
         self.partition_values = {}
         self.decrease_seq = []
         self.increase_seq = []
         self.equality_seq = []
         
-    @lru_cache(maxsize=None)
-    def get_divisors(self, n: int) -> List[int]:
-        """Get all divisors of n efficiently."""
-        divisors = []
-        for i in range(1, int(math.sqrt(n)) + 1):
-            if n % i == 0:
-                divisors.append(i)
-                if i != n // i:
-                    divisors.append(n // i)
-        return sorted(divisors)
-    
     def can_partition_with_k_factors(self, n: int, k: int) -> bool:
         """Check if n can be partitioned into k factors, each >= k."""
         if k == 1:
@@ -34,9 +142,9 @@ class StatisticalConjectureAnalyzer:
             return False
             
         if k == 2:
-            divisors = self.get_divisors(n)
-            for d in divisors:
-                if d >= 2 and n // d >= 2:
+            # Trial division keeps memory flat during long streaming runs.
+            for d in range(2, math.isqrt(n) + 1):
+                if n % d == 0:
                     return True
             return False
         
@@ -44,6 +152,9 @@ class StatisticalConjectureAnalyzer:
     
     def _recursive_partition_check(self, remaining: int, factors_left: int, min_factor: int) -> bool:
         """Recursively check if remaining can be partitioned."""
+        if self.instrumentation is not None:
+            self.instrumentation.count('dfs_nodes')
+        
         if factors_left == 0:
             return remaining == 1
         
@@ -66,7 +177,14 @@ class StatisticalConjectureAnalyzer:
     @lru_cache(maxsize=None)
     def partition_function(self, n: int) -> int:
         """Calculate P_π(n)."""
+        if self.backend == 'numba':
+            if self.instrumentation is not None:
+                self.instrumentation.count('n_evaluated')
+            return self._kernel_partition_value(n, self.backend)
+
         if n == 1:
+            if self.instrumentation is not None:
+                self.instrumentation.count('n_evaluated')
             return 1
         
         max_k = 1
@@ -77,38 +195,180 @@ class StatisticalConjectureAnalyzer:
                 max_k = k
             k += 1
         
+        if self.instrumentation is not None:
+            self.instrumentation.count('n_evaluated')
+            self.instrumentation.count('k_levels_tried', k - 1)
+        
         return max_k
     
     def compute_sequences(self):
         """Compute partition function values and sequences up to max_n."""
         print(f"Computing partition function for n = 1 to {self.max_n}...")
         print("This may take several hours for large values...")
+        if self.memory_budget is not None:
+            self._compute_sequences_out_of_core()
+            return
+        instr = self.instrumentation
         
         # Batch processing for memory efficiency
         batch_size = 10000
-        for start in range(1, self.max_n + 1, batch_size):
-            end = min(start + batch_size - 1, self.max_n)
-            print(f"Processing batch: {start} to {end}")
-            
-            for n in range(start, end + 1):
-                if n % 10000 == 0:
-                    print(f"Progress: {n}/{self.max_n}")
-                self.partition_values[n] = self.partition_function(n)
+        with stage_of(instr, 'value_computation'):
+            for start in range(1, self.max_n + 1, batch_size):
+                end = min(start + batch_size - 1, self.max_n)
+                if instr is None:
+                    print(f"Processing batch: {start} to {end}")
+                
+                for n in range(start, end + 1):
+                    if instr is not None:
+                        instr.observe(n)
+                    elif n % 10000 == 0:
+                        print(f"Progress: {n}/{self.max_n}")
+                    self.partition_values[n] = self.partition_function(n)
         
         print("Computing sequences...")
-        for m in range(1, self.max_n):
-            if m % 50000 == 0:
-                print(f"Sequence progress: {m}/{self.max_n}")
+        with stage_of(instr, 'classification'):
+            for m in range(1, self.max_n):
+                if instr is None and m % 50000 == 0:
+                    print(f"Sequence progress: {m}/{self.max_n}")
+                    
+                p_m = self.partition_values[m]
+                p_m_plus_1 = self.partition_values[m + 1]
                 
-            p_m = self.partition_values[m]
-            p_m_plus_1 = self.partition_values[m + 1]
-            
-            if p_m > p_m_plus_1:
-                self.decrease_seq.append(m)
-            elif p_m < p_m_plus_1:
-                self.increase_seq.append(m)
-            else:
-                self.equality_seq.append(m)
+                seq_type = classify_transition(p_m, p_m_plus_1)
+                if seq_type == 'decrease':
+                    self.decrease_seq.append(m)
+                elif seq_type == 'increase':
+                    self.increase_seq.append(m)
+                else:
+                    self.equality_seq.append(m)
+        
+        if instr is not None:
+            instr.finish()
+            instr.record_cache('partition_function', self.partition_function.cache_info())
+    
+    def _compute_sequences_out_of_core(self):
+        """compute_sequences under memory_budget.
+        
+        Values and the three sequences go to SegmentedArrays: a quarter of
+        the budget is split between their in-memory buffers, a quarter
+        bounds the partition_function cache (cleared when full), and the rest is left for
+        the interpreter and the memory-mapped segments being read.
+        """
+        instr = self.instrumentation
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="pi_segments_")
+            self._owns_spill_dir = True
+        # Values are 1 byte, sequence terms 8 bytes
+        segment_items = max(4096, self.memory_budget // 4 // (1 + 3 * 8))
+        max_cached = max(1024, self.memory_budget // 4 // _CACHE_ENTRY_BYTES)
+        print(f"Memory budget {self.memory_budget / 2**20:,.0f} MB: spilling to {self.spill_dir} "
+              f"in segments of {segment_items:,} values")
+        
+        self.partition_values = SegmentedArray(self.spill_dir, 'values', 'b', segment_items, base=1)
+        self.decrease_seq = SegmentedArray(self.spill_dir, 'decrease', 'q', segment_items)
+        self.equality_seq = SegmentedArray(self.spill_dir, 'equality', 'q', segment_items)
+        self.increase_seq = SegmentedArray(self.spill_dir, 'increase', 'q', segment_items)
+        sequences = {'decrease': self.decrease_seq, 'equality': self.equality_seq,
+                     'increase': self.increase_seq}
+        
+        # Values are classified as they are produced, in the same pass
+        with stage_of(instr, 'value_computation'):
+            p_prev = None
+            for n in range(1, self.max_n + 1):
+                if instr is not None:
+                    instr.observe(n)
+                elif n % 100000 == 0:
+                    print(f"Progress: {n}/{self.max_n}")
+                p_n = self.partition_function(n)
+                self.partition_values.append(p_n)
+                if p_prev is not None:
+                    sequences[classify_transition(p_prev, p_n)].append(n - 1)
+                p_prev = p_n
+                if n % 4096 == 0 and self.partition_function.cache_info().currsize > max_cached:
+                    self._evict_caches()
+        
+        if instr is not None:
+            instr.finish()
+            instr.record_cache('partition_function', self.partition_function.cache_info())
+            instr.count('cache_evictions', self.cache_evictions)
+    
+    def close(self):
+        """Unmap the on-disk segments and delete a temporary spill directory.
+
+        Segments in a spill_dir passed by the caller are kept.
+        """
+        for sequence in (self.partition_values, self.decrease_seq,
+                         self.equality_seq, self.increase_seq):
+            if isinstance(sequence, SegmentedArray):
+                sequence.close()
+        if self._owns_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self._owns_spill_dir = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _evict_caches(self):
+        # lru_cache cannot be resized per instance; the sweep never revisits
+        # an n, so dropping the whole cache loses nothing
+        self.partition_function.cache_clear()
+        self.cache_evictions += 1
+    
+    def compute_conjecture_values_online(self, M_values: List[int]) -> List[Dict]:
+        """Compute conjecture values in a single pass without storing sequences.
+
+        P_π is evaluated bypassing the lru_cache so only the previous value
+        and the OnlineConjectureStatistics accumulators are kept in memory.
+        """
+        stats = OnlineConjectureStatistics(M_values)
+        if not stats.checkpoints:
+            return []
+        last_M = stats.checkpoints[-1]
+        uncached_partition_function = type(self).partition_function.__wrapped__
+        
+        print(f"Streaming conjecture values for {len(stats.checkpoints)} M values up to {last_M:,}...")
+        
+        instr = self.instrumentation
+        with stage_of(instr, 'online_statistics'):
+            p_prev = uncached_partition_function(self, 1)
+            for n in range(2, last_M + 2):
+                if instr is not None:
+                    instr.observe(n)
+                elif n % 100000 == 0:
+                    print(f"Progress: {n}/{last_M + 1}")
+                p_n = uncached_partition_function(self, n)
+                stats.update(n - 1, classify_transition(p_prev, p_n))
+                p_prev = p_n
+        
+        if instr is not None:
+            instr.finish()
+        
+        return stats.results
+    
+    def generate_power_of_10_M_values(self) -> List[int]:
+        """Generate M = 10, 100, ... up to max_n - 1."""
+        M_values = []
+        M = 10
+        while M <= self.max_n - 1:
+            M_values.append(M)
+            M *= 10
+        return M_values
+    
+    def generate_log_grid_M_values(self, points_per_decade: int = 20) -> List[int]:
+        """Generate a dense logarithmic grid of M values from 10 up to max_n - 1."""
+        M_values = set()
+        if self.max_n - 1 < 10:
+            return []
+        log_upper = math.log10(self.max_n - 1)
+        steps = int(math.ceil((log_upper - 1) * points_per_decade))
+        for i in range(steps + 1):
+            M = int(round(10 ** (1 + i / points_per_decade)))
+            M_values.add(min(M, self.max_n - 1))
+        return sorted(M_values)
     
     def generate_statistical_M_values(self) -> List[int]:
         """Generate M values with statistical sampling between powers of 10."""
@@ -156,14 +416,11 @@ class StatisticalConjectureAnalyzer:
     
     def find_j_M(self, sequence: List[int], M: int) -> int:
         """Find j_M = max{j : sequence[j-1] <= M}"""
-        count = 0
-        for val in sequence:
-            if val <= M:
-                count += 1
-            else:
-                break
-        return count
+        # Sequences are increasing, so this is a binary search (also on
+        # memory-mapped sequences)
+        return bisect.bisect_right(sequence, M)
     
+    @timed_stage('conjecture_values')
     def compute_conjecture_values(self, M_values: List[int]) -> List[Dict]:
         """Compute conjecture values for given M values."""
         results = []
@@ -212,6 +469,7 @@ class StatisticalConjectureAnalyzer:
         
         return results
     
+    @timed_stage('table_output')
     def generate_latex_table(self, results: List[Dict], filename: str = "statistical_conjecture_table.tex"):
         """Generate LaTeX tables for statistical conjecture analysis."""
         
@@ -409,6 +667,7 @@ $M$ & $|M - d_{j^{(-)}_M}|$ & $|M - e_{j^{(0)}_M}|$ & $|M - i_{j^{(+)}_M}|$ & $\
         print(f"LaTeX tables saved to {filename}")
         return latex_content
     
+    @timed_stage('table_output')
     def save_sequences(self, filename: str = "sequences_data.txt"):
         """Save computed sequences to file for later analysis."""
         with open(filename, 'w') as f:
@@ -426,38 +685,26 @@ $M$ & $|M - d_{j^{(-)}_M}|$ & $|M - e_{j^{(0)}_M}|$ & $|M - i_{j^{(+)}_M}|$ & $\
             f.write("Increase sequence (first 100):\n")
             f.write(str(self.increase_seq[:100]) + "\n")
 
-def main():
-    # Configuration for statistical analysis up to 10^6
-    max_n = 1000000  # 10^6
-    
-    print("Statistical Conjecture Analyzer")
-    print(f"Computing up to n = {max_n:,}")
-    print("This will take significant time and memory...")
-    
-    # Create analyzer and compute sequences
-    analyzer = StatisticalConjectureAnalyzer(max_n)
-    analyzer.compute_sequences()
-    
-    # Save sequences for future reference
-    analyzer.save_sequences()
-    
-    print(f"\nSequence statistics:")
-    print(f"Decrease sequence: {len(analyzer.decrease_seq):,} terms")
-    print(f"Equality sequence: {len(analyzer.equality_seq):,} terms")
-    print(f"Increase sequence: {len(analyzer.increase_seq):,} terms")
-    
-    # Generate statistical M values
-    M_values = analyzer.generate_statistical_M_values()
-    print(f"\nGenerated {len(M_values)} M values for analysis")
-    print(f"M values range: {min(M_values)} to {max(M_values):,}")
-    
-    # Compute conjecture values
-    results = analyzer.compute_conjecture_values(M_values)
-    
-    # Generate LaTeX tables
-    latex_content = analyzer.generate_latex_table(results)
-    
-    # Print summary statistics
+    @timed_stage('table_output')
+    def export_sequence_csv(self, filename: str = "sequences.csv", batch_size: int = 10000):
+        """Write every classified m as n,P_pi(n),SequenceType,SequenceIndex.
+        
+        Rows are formatted and written by a BackgroundWriter thread while
+        this loop keeps classifying.
+        """
+        counters = {'decrease': 0, 'equality': 0, 'increase': 0}
+        with BackgroundWriter(filename, header="n,P_pi(n),SequenceType,SequenceIndex",
+                              batch_size=batch_size) as writer:
+            for m in range(1, self.max_n):
+                p_m = self.partition_values[m]
+                seq_type = classify_transition(p_m, self.partition_values[m + 1])
+                counters[seq_type] += 1
+                writer.write((m, p_m, seq_type, counters[seq_type]))
+        
+        print(f"Sequence CSV saved to {filename}")
+
+def print_summary(results: List[Dict]):
+    """Print conjecture values grouped by order of magnitude of M."""
     print("\nStatistical Summary:")
     print("M\t\tC^(-)\t\tC^(0)\t\tC^(+)\t\t2C^(-) + C^(0)")
     print("-" * 80)
@@ -481,8 +728,87 @@ def main():
             if C_minus > 0 and C_zero > 0:
                 relation_value = 2*C_minus + C_zero
                 print(f"{M:8,}\t{C_minus:.6f}\t{C_zero:.6f}\t{C_plus:.6f}\t{relation_value:.6f}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Statistical conjecture analysis for P_π(n).")
+    parser.add_argument("--max-n", type=int, default=1000000,
+                        help="compute P_π(n) for n = 1..max_n (default: 10^6)")
+    parser.add_argument("--checkpoints", choices=["statistical", "powers", "log-grid"],
+                        default="statistical", help="which M values to report")
+    parser.add_argument("--points-per-decade", type=int, default=20,
+                        help="density of the log-grid checkpoints")
+    parser.add_argument("--online", action="store_true",
+                        help="stream the statistics without storing the sequences")
+    parser.add_argument("--table", default="statistical_conjecture_table.tex",
+                        help="LaTeX table output file")
+    parser.add_argument("--sequences", default="sequences_data.txt",
+                        help="sequence summary output file (ignored with --online)")
+    parser.add_argument("--sequence-csv", default=None,
+                        help="also write every classified n to this CSV (ignored with --online)")
+    parser.add_argument("--memory-budget", type=parse_memory_size, default=None,
+                        help="e.g. 4G: spill values and sequences to memory-mapped segments "
+                             "and bound the caches to stay within this budget")
+    parser.add_argument("--spill-dir", default=None,
+                        help="directory for the on-disk segments (default: a temporary directory)")
+    parser.add_argument("--backend", choices=("python", "numba", "auto"), default=None,
+                        help="numba computes P_π(n) with the compiled partition_kernels; "
+                             "python, or no flag, keeps the exhaustive search (auto: numba if installed)")
+    parser.add_argument("--instrument-json", default=None,
+                        help="enable instrumentation and export it to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    max_n = args.max_n
+    
+    print("Statistical Conjecture Analyzer")
+    print(f"Computing up to n = {max_n:,}")
+    
+    instrumentation = Instrumentation() if args.instrument_json else None
+    analyzer = StatisticalConjectureAnalyzer(max_n, instrumentation, args.memory_budget, args.spill_dir,
+                                             args.backend)
     
-    print(f"\nAnalysis complete. Results saved to statistical_conjecture_table.tex")
+    with analyzer:
+        if args.checkpoints == "powers":
+            M_values = analyzer.generate_power_of_10_M_values()
+        elif args.checkpoints == "log-grid":
+            M_values = analyzer.generate_log_grid_M_values(args.points_per_decade)
+        else:
+            M_values = analyzer.generate_statistical_M_values()
+        if not M_values:
+            print("No M values within range; increase --max-n")
+            return
+        
+        print(f"\nGenerated {len(M_values)} M values for analysis")
+        print(f"M values range: {min(M_values)} to {max(M_values):,}")
+        
+        if args.online:
+            results = analyzer.compute_conjecture_values_online(M_values)
+        else:
+            print("This will take significant time and memory...")
+            analyzer.compute_sequences()
+            
+            # Save sequences for future reference
+            analyzer.save_sequences(args.sequences)
+            if args.sequence_csv:
+                analyzer.export_sequence_csv(args.sequence_csv)
+            
+            print(f"\nSequence statistics:")
+            print(f"Decrease sequence: {len(analyzer.decrease_seq):,} terms")
+            print(f"Equality sequence: {len(analyzer.equality_seq):,} terms")
+            print(f"Increase sequence: {len(analyzer.increase_seq):,} terms")
+            
+            results = analyzer.compute_conjecture_values(M_values)
+        
+        # Generate LaTeX tables
+        analyzer.generate_latex_table(results, args.table)
+        
+        print_summary(results)
+        
+        if instrumentation is not None:
+            instrumentation.export_json(args.instrument_json)
+        
+    print(f"\nAnalysis complete. Results saved to {args.table}")
 
 if __name__ == "__main__":
     main()
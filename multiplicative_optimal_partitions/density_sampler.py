@@ -0,0 +1,157 @@
+"""
+Monte-Carlo estimates of C^(-), C^(0), C^(+), 2C^(-) + C^(0) and 2C^(+) + C^(0).
+
+Instead of computing the sequences up to M, n is drawn uniformly from
+[1, max_n] (or stratified per decade, with samples allocated in
+proportion to the decade sizes) and P_π(n), P_π(n+1) are evaluated with
+partition_query.partition_value. Batches are sampled in parallel,
+folded in batch order (so results do not depend on the number of
+workers) and sampling stops once every confidence interval is narrower
+than the requested precision.
+"""
+
+import argparse
+import os
+import random
+from collections import deque
+from multiprocessing import Pool
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+from conjecture_analyzer import SEQUENCE_TYPES, classify_transition
+from partition_query import partition_value
+
+
+def decade_strata(max_n: int) -> List[Tuple[int, int]]:
+    """Split [1, max_n] into [10^d, 10^(d+1) - 1] strata."""
+    strata = []
+    lo = 1
+    while lo <= max_n:
+        hi = min(lo * 10 - 1, max_n)
+        strata.append((lo, hi))
+        lo *= 10
+    return strata
+
+
+def _sample_batch(task) -> List[List[int]]:
+    """Draw samples for one batch; returns [decrease, equality, increase] per stratum."""
+    seed, strata, per_stratum = task
+    rng = random.Random(seed)
+    counts = []
+    for (lo, hi), size in zip(strata, per_stratum):
+        stratum_counts = [0, 0, 0]
+        for _ in range(size):
+            n = rng.randint(lo, hi)
+            seq_type = classify_transition(partition_value(n), partition_value(n + 1))
+            stratum_counts[SEQUENCE_TYPES.index(seq_type)] += 1
+        counts.append(stratum_counts)
+    return counts
+
+
+class DensityEstimate:
+    """Running stratified estimate with normal-approximation confidence intervals."""
+
+    def __init__(self, strata: List[Tuple[int, int]], confidence: float = 0.95):
+        total = sum(hi - lo + 1 for lo, hi in strata)
+        self.strata = strata
+        self.weights = [(hi - lo + 1) / total for lo, hi in strata]
+        self.counts = [[0, 0, 0] for _ in strata]
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    @property
+    def samples(self) -> int:
+        return sum(sum(c) for c in self.counts)
+
+    def add(self, batch_counts: List[List[int]]):
+        for acc, counts in zip(self.counts, batch_counts):
+            for i in range(3):
+                acc[i] += counts[i]
+
+    def _estimate(self, value) -> Tuple[float, float]:
+        """Weighted mean and CI half-width of a per-sample value over the strata.
+
+        value maps a transition index (0, 1, 2) to the sampled quantity.
+        """
+        mean = 0.0
+        variance = 0.0
+        for weight, counts in zip(self.weights, self.counts):
+            size = sum(counts)
+            if size == 0:
+                return float('nan'), float('inf')
+            m1 = sum(c * value(i) for i, c in enumerate(counts)) / size
+            m2 = sum(c * value(i) ** 2 for i, c in enumerate(counts)) / size
+            mean += weight * m1
+            variance += weight ** 2 * max(m2 - m1 * m1, 0.0) / max(size - 1, 1)
+        return mean, self.z * variance ** 0.5
+
+    def estimates(self) -> Dict[str, Tuple[float, float]]:
+        """{'C_minus', 'C_zero', 'C_plus', 'relation_minus', 'relation_plus'} -> (estimate, half-width)."""
+        return {
+            'C_minus': self._estimate(lambda i: 1 if i == 0 else 0),
+            'C_zero': self._estimate(lambda i: 1 if i == 1 else 0),
+            'C_plus': self._estimate(lambda i: 1 if i == 2 else 0),
+            # 2C^(-) + C^(0): each sample contributes 2, 1 or 0
+            'relation_minus': self._estimate(lambda i: (2, 1, 0)[i]),
+            # 2C^(+) + C^(0): each sample contributes 0, 1 or 2
+            'relation_plus': self._estimate(lambda i: (0, 1, 2)[i])
+        }
+
+    def max_half_width(self) -> float:
+        return max(half for _, half in self.estimates().values())
+
+
+def estimate_densities(max_n: int, stratified: bool = False, precision: float = 1e-3,
+                       batch_size: int = 2000, max_samples: int = 10 ** 7,
+                       workers: Optional[int] = None, seed: int = 42,
+                       confidence: float = 0.95, verbose: bool = True) -> DensityEstimate:
+    """Sample until every interval half-width is <= precision or max_samples is reached."""
+    strata = decade_strata(max_n) if stratified else [(1, max_n)]
+    estimate = DensityEstimate(strata, confidence)
+    # Proportional allocation: a stratum gets samples in proportion to its
+    # weight (at least one per batch, so every stratum is estimated)
+    per_stratum = [max(1, round(batch_size * weight)) for weight in estimate.weights]
+
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    batch = 0
+
+    with Pool(workers) as pool:
+        while True:
+            # Keep a bounded number of batches in flight and fold them in order
+            while len(pending) < 2 * workers:
+                task = (seed + batch, strata, per_stratum)
+                pending.append(pool.apply_async(_sample_batch, (task,)))
+                batch += 1
+            estimate.add(pending.popleft().get())
+            half_width = estimate.max_half_width()
+            if verbose:
+                print(f"Samples: {estimate.samples:,}  max CI half-width: {half_width:.6f}")
+            if half_width <= precision or estimate.samples >= max_samples:
+                break
+
+    return estimate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte-Carlo density estimates for the P_π sequences.")
+    parser.add_argument("--max-n", type=int, default=10 ** 12, help="sample n from [1, max_n]")
+    parser.add_argument("--stratified", action="store_true", help="stratify samples per decade")
+    parser.add_argument("--precision", type=float, default=2e-3, help="target CI half-width")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--max-samples", type=int, default=10 ** 7)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    estimate = estimate_densities(args.max_n, args.stratified, args.precision, args.batch_size,
+                                  args.max_samples, args.workers, args.seed, args.confidence)
+
+    print(f"\nDensity estimates for n <= {args.max_n:,} ({estimate.samples:,} samples, "
+          f"{args.confidence:.0%} confidence):")
+    for name, (value, half_width) in estimate.estimates().items():
+        print(f"{name:14s}: {value:.6f} ± {half_width:.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Opt-in instrumentation for the P_π computations.
+
+An Instrumentation object collects hot-path counters (DFS nodes, memo
+hits/misses, k levels tried), per-stage wall-clock timers, throughput
+readings taken at a fixed time interval and, optionally, a cProfile run
+restricted to a chosen n-range. Everything can be exported as JSON.
+Analyzers skip all of it when no Instrumentation is passed in.
+"""
+
+import cProfile
+import json
+import pstats
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+
+class Instrumentation:
+    def __init__(self, report_interval: float = 10.0, verbose: bool = True,
+                 profile_range: Optional[Tuple[int, int]] = None,
+                 profile_path: Optional[str] = None):
+        self.counters = Counter()
+        self.timings: Dict[str, float] = {}
+        self.throughput: List[Dict] = []
+        self.caches: Dict[str, Dict] = {}
+        self.report_interval = report_interval
+        self.verbose = verbose
+        self.profile_range = profile_range
+        self.profile_path = profile_path
+        self.profile_stats: Optional[pstats.Stats] = None
+
+        self._profiler: Optional[cProfile.Profile] = None
+        self._start_time = time.perf_counter()
+        self._last_report_time = self._start_time
+        self._last_report_n = 0
+
+    def count(self, name: str, amount: int = 1):
+        """Increment a named counter."""
+        self.counters[name] += amount
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block; repeated stages with the same name accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def record_cache(self, name: str, cache_info):
+        """Store the hits/misses of an lru_cache (a functools CacheInfo)."""
+        self.caches[name] = {
+            'hits': cache_info.hits,
+            'misses': cache_info.misses,
+            'currsize': cache_info.currsize
+        }
+
+    def observe(self, n: int):
+        """Called once per n: drives throughput readings and range profiling."""
+        if self.profile_range is not None:
+            lo, hi = self.profile_range
+            if lo <= n <= hi and self._profiler is None and self.profile_stats is None:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            elif n > hi and self._profiler is not None:
+                self._stop_profiler()
+
+        now = time.perf_counter()
+        if now - self._last_report_time >= self.report_interval:
+            rate = (n - self._last_report_n) / (now - self._last_report_time)
+            self.throughput.append({
+                'elapsed': now - self._start_time,
+                'n': n,
+                'n_per_second': rate
+            })
+            if self.verbose:
+                print(f"Progress: n = {n:,} ({rate:,.0f} n/s)")
+            self._last_report_time = now
+            self._last_report_n = n
+
+    def _stop_profiler(self):
+        self._profiler.disable()
+        self.profile_stats = pstats.Stats(self._profiler)
+        if self.profile_path:
+            self.profile_stats.dump_stats(self.profile_path)
+        self._profiler = None
+
+    def finish(self):
+        """Close a profile run still open at the end of the computation."""
+        if self._profiler is not None:
+            self._stop_profiler()
+
+    def summary(self) -> Dict:
+        """Collect everything recorded so far into a JSON-serialisable dict."""
+        derived = {}
+        evaluated = self.counters.get('n_evaluated', 0)
+        if evaluated:
+            derived['k_levels_per_n'] = self.counters.get('k_levels_tried', 0) / evaluated
+            derived['dfs_nodes_per_n'] = self.counters.get('dfs_nodes', 0) / evaluated
+        return {
+            'counters': dict(self.counters),
+            'derived': derived,
+            'timings': self.timings,
+            'throughput': self.throughput,
+            'caches': self.caches,
+            'profile_range': list(self.profile_range) if self.profile_range else None,
+            'total_time': time.perf_counter() - self._start_time
+        }
+
+    def export_json(self, filename: str = "instrumentation.json"):
+        """Write summary() to a JSON file."""
+        self.finish()
+        with open(filename, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"Instrumentation saved to {filename}")
+
+
+def stage_of(instrumentation: Optional[Instrumentation], name: str):
+    """instrumentation.stage(name), or a no-op context when not instrumented."""
+    if instrumentation is None:
+        return nullcontext()
+    return instrumentation.stage(name)
+
+
+def timed_stage(name: str):
+    """Method decorator timing the call as a stage of self.instrumentation."""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with stage_of(self.instrumentation, name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
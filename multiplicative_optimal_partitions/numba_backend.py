@@ -0,0 +1,60 @@
+"""
+Backend selection shared by the optional Numba kernels.
+
+partition_kernels.py and factor_ge_n_factor/legendre_kernels.py both pick
+between a 'python' and a 'numba' backend here: from the backend argument,
+or the OEIS_BACKEND environment variable ('auto' or unset: Numba when it
+is installed). check_parity runs the python-vs-numba comparison of either
+module and reports a missing Numba as a skip, never as a pass.
+"""
+
+import os
+from typing import Callable, Iterable, Optional
+
+try:
+    import numba
+    import numpy as np
+except ImportError:
+    numba = None
+    np = None
+
+NUMBA_AVAILABLE = numba is not None
+BACKENDS = ('python', 'numba')
+
+
+def resolve_backend(backend=None) -> str:
+    """Pick 'numba' or 'python'.
+
+    backend (or the OEIS_BACKEND environment variable) may be 'python',
+    'numba' or 'auto'; 'auto' and unset use Numba when it is installed.
+    """
+    backend = backend or os.environ.get('OEIS_BACKEND', 'auto')
+    if backend == 'auto':
+        return 'numba' if NUMBA_AVAILABLE else 'python'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS} or 'auto'")
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        raise ImportError("The numba backend was requested but numba is not installed")
+    return backend
+
+
+def check_parity(cases: Iterable, compare: Callable[..., bool]) -> Optional[bool]:
+    """Run compare(case) (which prints its findings) for every case.
+
+    Returns True if all cases agree, False otherwise, and None (skipped)
+    when numba is not installed.
+    """
+    if not NUMBA_AVAILABLE:
+        print("numba is not installed: parity check skipped")
+        return None
+    ok = True
+    for case in cases:
+        ok = compare(case) and ok
+    return ok
+
+
+def exit_with_parity(ok: Optional[bool]):
+    """CLI exit status for a check_parity result: a skip is not a pass."""
+    if ok is None:
+        raise SystemExit("Parity check skipped: numba is not installed")
+    raise SystemExit(0 if ok else 1)
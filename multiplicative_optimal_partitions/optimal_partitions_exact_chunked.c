@@ -7,6 +7,7 @@
 #include <sys/stat.h>
 #include <unistd.h>
 #include <limits.h>  // Added for LLONG_MAX
+#include <pthread.h>
 
 // Memory management for chunks < 20GB
 #define MAX_CHUNK_SIZE 50000000    // 50M numbers per chunk (~1.2GB RAM)
@@ -254,24 +255,50 @@ static int safe_system_call(const char* command) {
     return result;
 }
 
-// Process a single chunk with exact algorithm
-static bool process_chunk(long long start_n, long long end_n, const char* chunk_filename,
-                         int* prev_P_pi, bool is_first_chunk) {
+// Per-chunk buffers. Two of them are used alternately so that chunk c+1
+// is computed while a writer thread formats and writes chunk c.
+typedef struct {
+    long long start_n;
+    long long chunk_size;
+    int* P_pi_values;              // chunk_size + 1 entries (last one is P_π(end_n + 1))
+    Factorization* factorizations;
+    long long capacity;
+    char filename[300];
+    bool ok;
+} ChunkBuffer;
+
+static bool chunk_buffer_init(ChunkBuffer* buf, long long capacity) {
+    buf->capacity = capacity;
+    buf->P_pi_values = malloc((size_t)(capacity + 1) * sizeof(int));
+    buf->factorizations = malloc((size_t)capacity * sizeof(Factorization));
+    if (!buf->P_pi_values || !buf->factorizations) {
+        free(buf->P_pi_values);
+        free(buf->factorizations);
+        buf->P_pi_values = NULL;
+        buf->factorizations = NULL;
+        return false;
+    }
+    return true;
+}
+
+static void chunk_buffer_free(ChunkBuffer* buf) {
+    free(buf->P_pi_values);
+    free(buf->factorizations);
+    buf->P_pi_values = NULL;
+    buf->factorizations = NULL;
+}
+
+// Compute P_π values and factorizations for one chunk with exact algorithm
+static void compute_chunk(ChunkBuffer* buf, long long start_n, long long end_n) {
 
     printf("Processing chunk: %lld to %lld (EXACT ALGORITHM)\n", start_n, end_n);
 
     long long chunk_size = end_n - start_n + 1;
+    int* P_pi_values = buf->P_pi_values;
+    Factorization* factorizations = buf->factorizations;
 
-    // Allocate memory for this chunk
-    int* P_pi_values = malloc((size_t)(chunk_size + 1) * sizeof(int));
-    Factorization* factorizations = malloc((size_t)chunk_size * sizeof(Factorization));
-
-    if (!P_pi_values || !factorizations) {
-        printf("Error: Memory allocation failed for chunk\n");
-        free(P_pi_values);
-        free(factorizations);
-        return false;
-    }
+    buf->start_n = start_n;
+    buf->chunk_size = chunk_size;
 
     // Calculate P_π values for this chunk using EXACT algorithm
     clock_t start_time = clock();
@@ -297,38 +324,38 @@ static bool process_chunk(long long start_n, long long end_n, const char* chunk_
     clock_t calc_time = clock();
     printf("  EXACT calculation time: %.2f seconds\n",
            (double)(calc_time - start_time) / CLOCKS_PER_SEC);
+}
 
-    // Write chunk to CSV
-    FILE* file = fopen(chunk_filename, "w");
+// Writer thread: classify, format and write a computed chunk to CSV
+static void* write_chunk(void* arg) {
+    ChunkBuffer* buf = (ChunkBuffer*)arg;
+    long long chunk_size = buf->chunk_size;
+    int* P_pi_values = buf->P_pi_values;
+    Factorization* factorizations = buf->factorizations;
+
+    buf->ok = false;
+
+    FILE* file = fopen(buf->filename, "w");
     if (!file) {
-        printf("Error: Could not create chunk file %s\n", chunk_filename);
-        free(P_pi_values);
-        free(factorizations);
-        return false;
+        printf("Error: Could not create chunk file %s\n", buf->filename);
+        return NULL;
     }
 
     setvbuf(file, NULL, _IOFBF, BUFFER_SIZE);
 
-    // Write header only for first chunk
-    if (is_first_chunk) {
-        fprintf(file, "n,P_pi(n),Factorization,SequenceType,SequenceIndex\n");
-    }
-
+    // Chunk files have no header: combine_chunks writes it once
     char fact_str[128];
     const char* seq_names[] = {"decrease", "equality", "increase"};
 
     for (long long i = 0; i < chunk_size; i++) {
-        long long n = start_n + i;
+        long long n = buf->start_n + i;
         int P_pi_n = P_pi_values[i];
+        // P_pi_values[chunk_size] is P_π(end_n + 1), so the last n of the
+        // chunk is classified without looking at the next chunk
         int P_pi_n_plus_1 = P_pi_values[i + 1];
 
-        // Handle boundary with previous chunk
-        if (i == 0 && !is_first_chunk) {
-            P_pi_n_plus_1 = P_pi_values[i];
-            P_pi_n = *prev_P_pi;
-        }
-
         // Determine sequence type and update global counters
+        // (only one writer runs at a time, so chunks are counted in order)
         SequenceType seq_type;
         long long seq_index;
 
@@ -352,18 +379,8 @@ static bool process_chunk(long long start_n, long long end_n, const char* chunk_
     }
 
     fclose(file);
-
-    // Store last P_π value for next chunk
-    *prev_P_pi = P_pi_values[chunk_size - 1];
-
-    free(P_pi_values);
-    free(factorizations);
-
-    clock_t end_time = clock();
-    printf("  Chunk completed in %.2f seconds\n",
-           (double)(end_time - start_time) / CLOCKS_PER_SEC);
-
-    return true;
+    buf->ok = true;
+    return NULL;
 }
 
 // Combine chunk files into final CSV
@@ -382,7 +399,6 @@ static bool combine_chunks(const Config* config) {
     fprintf(output, "n,P_pi(n),Factorization,SequenceType,SequenceIndex\n");
 
     char buffer[1024];
-    bool first_chunk = true;
 
     for (int chunk = 0; chunk < config->num_chunks; chunk++) {
         char chunk_filename[300];
@@ -396,14 +412,6 @@ static bool combine_chunks(const Config* config) {
             return false;
         }
 
-        // Skip header for non-first chunks
-        if (!first_chunk) {
-            if (fgets(buffer, sizeof(buffer), input) == NULL) {
-                printf("Warning: Empty chunk file %s\n", chunk_filename);
-            }
-        }
-        first_chunk = false;
-
         // Copy data
         while (fgets(buffer, sizeof(buffer), input)) {
             fputs(buffer, output);
@@ -447,7 +455,7 @@ static bool process_large_range(const Config* config) {
     printf("Range: 1 to %lld\n", config->total_n);
     printf("Chunk size: %lld\n", config->chunk_size);
     printf("Number of chunks: %d\n", config->num_chunks);
-    printf("Memory per chunk: ~%.1f GB\n",
+    printf("Memory per chunk: ~%.1f GB (x2, double-buffered)\n",
            (config->chunk_size * (sizeof(int) + sizeof(Factorization))) / (1024.0 * 1024.0 * 1024.0));
     printf("\n");
 
@@ -459,25 +467,66 @@ static bool process_large_range(const Config* config) {
         return false;
     }
 
-    int prev_P_pi = 1; // P_π(0) conceptually, but we start from n=1
+    // Double buffering: chunk c is computed into buffers[c % 2] while the
+    // writer thread is still writing chunk c-1 from the other buffer.
+    long long buffer_capacity = (config->chunk_size < config->total_n) ?
+                                config->chunk_size : config->total_n;
+    ChunkBuffer buffers[2];
+    if (!chunk_buffer_init(&buffers[0], buffer_capacity) ||
+        !chunk_buffer_init(&buffers[1], buffer_capacity)) {
+        printf("Error: Memory allocation failed for chunk\n");
+        chunk_buffer_free(&buffers[0]);
+        return false;
+    }
+
+    pthread_t writer;
+    bool writer_running = false;
+    int writer_chunk = -1;
+    bool failed = false;
 
     // Process each chunk
-    for (int chunk = 0; chunk < config->num_chunks; chunk++) {
+    for (int chunk = 0; chunk < config->num_chunks && !failed; chunk++) {
         long long start_n = chunk * config->chunk_size + 1;
         long long end_n = ((chunk + 1) * config->chunk_size > config->total_n) ?
                          config->total_n : (chunk + 1) * config->chunk_size;
 
-        char chunk_filename[300];
-        snprintf(chunk_filename, sizeof(chunk_filename),
-                "%s/chunk_%03d.csv", config->output_dir, chunk);
+        ChunkBuffer* buf = &buffers[chunk % 2];
 
         printf("\n--- EXACT Chunk %d/%d ---\n", chunk + 1, config->num_chunks);
 
-        if (!process_chunk(start_n, end_n, chunk_filename, &prev_P_pi, chunk == 0)) {
-            printf("Error: Failed to process chunk %d\n", chunk);
-            return false;
+        clock_t chunk_start = clock();
+        compute_chunk(buf, start_n, end_n);
+
+        // Backpressure: at most one chunk is waiting on the writer
+        if (writer_running) {
+            pthread_join(writer, NULL);
+            writer_running = false;
+            if (!buffers[writer_chunk % 2].ok) {
+                printf("Error: Failed to write chunk %d\n", writer_chunk);
+                failed = true;
+                break;
+            }
         }
 
+        snprintf(buf->filename, sizeof(buf->filename),
+                "%s/chunk_%03d.csv", config->output_dir, chunk);
+        if (pthread_create(&writer, NULL, write_chunk, buf) != 0) {
+            printf("Error: Could not start writer thread, writing synchronously\n");
+            write_chunk(buf);
+            if (!buf->ok) {
+                printf("Error: Failed to process chunk %d\n", chunk);
+                failed = true;
+                break;
+            }
+        } else {
+            writer_running = true;
+            writer_chunk = chunk;
+        }
+
+        clock_t chunk_end = clock();
+        printf("  Chunk completed in %.2f seconds\n",
+               (double)(chunk_end - chunk_start) / CLOCKS_PER_SEC);
+
         // Memory cleanup hint for OS (Linux only)
         #ifdef __linux__
         if (access("/proc/sys/vm/drop_caches", W_OK) == 0) {
@@ -489,6 +538,22 @@ static bool process_large_range(const Config* config) {
         #endif
     }
 
+    // Flush the last chunk before combining
+    if (writer_running) {
+        pthread_join(writer, NULL);
+        if (!buffers[writer_chunk % 2].ok) {
+            printf("Error: Failed to write chunk %d\n", writer_chunk);
+            failed = true;
+        }
+    }
+
+    chunk_buffer_free(&buffers[0]);
+    chunk_buffer_free(&buffers[1]);
+
+    if (failed) {
+        return false;
+    }
+
     // Combine chunks
     printf("\n");
     if (!combine_chunks(config)) {
@@ -568,9 +633,10 @@ int main(int argc, char* argv[]) {
 
     // Validate memory requirements
     double chunk_memory_gb = (config.chunk_size * (sizeof(int) + sizeof(Factorization))) / (1024.0 * 1024.0 * 1024.0);
-    if (chunk_memory_gb > 18.0) {
-        printf("Error: Chunk size too large (%.1f GB > 18 GB limit)\n", chunk_memory_gb);
-        printf("Reduce chunk size with: %s %lld %lld\n", argv[0], config.total_n, (long long)(18.0 * 1024 * 1024 * 1024 / (sizeof(int) + sizeof(Factorization))));
+    // Two chunk buffers are alive at once (compute + background writer)
+    if (2 * chunk_memory_gb > 18.0) {
+        printf("Error: Chunk size too large (2 x %.1f GB > 18 GB limit)\n", chunk_memory_gb);
+        printf("Reduce chunk size with: %s %lld %lld\n", argv[0], config.total_n, (long long)(9.0 * 1024 * 1024 * 1024 / (sizeof(int) + sizeof(Factorization))));
         return 1;
     }
 
@@ -0,0 +1,210 @@
+"""
+Optional JIT-compiled kernels for the P_π(n) partition search.
+
+The compiled backend is an iterative, int64 version of
+_recursive_partition_check / partition_function from the analyzers,
+compiled with Numba when it is installed. Without Numba (or with
+OEIS_BACKEND=python) the same values come from the analyzers' own
+recursive search; backend selection lives in numba_backend.py.
+`python partition_kernels.py --check-parity` compares both.
+"""
+
+import argparse
+from array import array
+from typing import Optional
+
+import numba_backend
+from numba_backend import BACKENDS, NUMBA_AVAILABLE, numba, np, resolve_backend
+
+# Fixed ranges for --check-parity: small n, and two windows where the
+# kernel's int64 arithmetic and pruning work on larger factors
+PARITY_RANGES = ((1, 20000), (10 ** 6, 10 ** 6 + 20000), (10 ** 9 - 1000, 10 ** 9 + 1000))
+
+
+# The python backend is the analyzers' own search, created on first use
+_reference = None
+
+
+def _reference_analyzer():
+    global _reference
+    if _reference is None:
+        from conjecture_analyzer import StatisticalConjectureAnalyzer
+        _reference = StatisticalConjectureAnalyzer(max_n=0)
+    return _reference
+
+
+def _py_partition_value(n: int) -> int:
+    """P_π(n) from StatisticalConjectureAnalyzer.partition_function, uncached."""
+    analyzer = _reference_analyzer()
+    return type(analyzer).partition_function.__wrapped__(analyzer, n)
+
+
+def _py_can_partition(n: int, k: int) -> bool:
+    return _reference_analyzer().can_partition_with_k_factors(n, k)
+
+
+# ---------------------------------------------------------------------------
+# Kernels compiled by Numba (int64 only)
+# ---------------------------------------------------------------------------
+
+def _pow_capped(base, exp, cap):
+    """base**exp, or cap + 1 as soon as the product exceeds cap (no overflow)."""
+    result = 1
+    for _ in range(exp):
+        if result > cap // base:
+            return cap + 1
+        result *= base
+    return result
+
+
+def _max_factor(remaining, factors_left, k):
+    bound = remaining // _pow_capped(k, factors_left - 1, remaining)
+    root = int(remaining ** (1.0 / factors_left)) + 1
+    return bound if bound < root else root
+
+
+def _can_partition_kernel(n, k):
+    """Iterative form of can_partition_with_k_factors(n, k)."""
+    if k == 1:
+        return n >= 1
+    if _pow_capped(k, k, n) > n:
+        return False
+    if k == 2:
+        d = 2
+        while d * d <= n:
+            if n % d == 0:
+                return True
+            d += 1
+        return False
+
+    # One frame per chosen factor: remaining value, next factor, last factor
+    remaining = np.empty(k, np.int64)
+    next_factor = np.empty(k, np.int64)
+    max_factor = np.empty(k, np.int64)
+    depth = 0
+    remaining[0] = n
+    next_factor[0] = k
+    max_factor[0] = _max_factor(n, k, k)
+
+    while depth >= 0:
+        factor = next_factor[depth]
+        if factor > max_factor[depth]:
+            depth -= 1
+            continue
+        next_factor[depth] = factor + 1
+        if remaining[depth] % factor != 0:
+            continue
+        rest = remaining[depth] // factor
+        factors_left = k - depth - 1
+        if factors_left == 1:
+            if rest >= k:
+                return True
+            continue
+        if _pow_capped(k, factors_left, rest) > rest:
+            continue
+        depth += 1
+        remaining[depth] = rest
+        next_factor[depth] = k
+        max_factor[depth] = _max_factor(rest, factors_left, k)
+
+    return False
+
+
+def _partition_value_kernel(n):
+    if n == 1:
+        return 1
+    max_k = 1
+    k = 1
+    while _pow_capped(k, k, n) <= n:
+        if _can_partition_kernel(n, k):
+            max_k = k
+        k += 1
+    return max_k
+
+
+def _partition_values_kernel(lo, hi, out):
+    for i in numba.prange(hi - lo + 1):
+        out[i] = _partition_value_kernel(lo + i)
+
+
+if NUMBA_AVAILABLE:
+    _pow_capped = numba.njit(cache=True)(_pow_capped)
+    _max_factor = numba.njit(cache=True)(_max_factor)
+    _can_partition_kernel = numba.njit(cache=True)(_can_partition_kernel)
+    _partition_value_kernel = numba.njit(cache=True)(_partition_value_kernel)
+    _partition_values_kernel = numba.njit(cache=True, parallel=True)(_partition_values_kernel)
+
+
+def partition_values(lo: int, hi: int, backend=None) -> array:
+    """P_π(n) for n = lo..hi as array('b'), computed with the selected backend."""
+    if resolve_backend(backend) == 'numba':
+        if hi >= 2 ** 62:
+            raise OverflowError("The numba backend works on int64; use the python backend")
+        out = np.empty(hi - lo + 1, np.int8)
+        _partition_values_kernel(lo, hi, out)
+        return array('b', out.tobytes())
+    return array('b', (_py_partition_value(n) for n in range(lo, hi + 1)))
+
+
+def partition_value(n: int, backend=None) -> int:
+    """P_π(n) for a single n with the selected backend."""
+    if resolve_backend(backend) == 'numba' and n < 2 ** 62:
+        return int(_partition_value_kernel(n))
+    return _py_partition_value(n)
+
+
+def can_partition(n: int, k: int, backend=None) -> bool:
+    """Whether n is a product of k factors, each >= k, with the selected backend."""
+    if resolve_backend(backend) == 'numba' and n < 2 ** 62:
+        return bool(_can_partition_kernel(n, k))
+    return _py_can_partition(n, k)
+
+
+def _compare_range(bounds) -> bool:
+    lo, hi = bounds
+    expected = partition_values(lo, hi, 'python')
+    actual = partition_values(lo, hi, 'numba')
+    mismatches = [lo + i for i, (p, q) in enumerate(zip(expected, actual)) if p != q]
+    if mismatches:
+        n = mismatches[0]
+        print(f"{len(mismatches)} mismatches on [{lo:,}, {hi:,}], first at n = {n}: "
+              f"python {expected[n - lo]}, numba {actual[n - lo]}")
+        return False
+    print(f"Backends agree on P_π(n) for n = {lo:,} to {hi:,}")
+    return True
+
+
+def check_parity(ranges=PARITY_RANGES) -> Optional[bool]:
+    """Compare the python and numba backends on each [lo, hi] in ranges.
+
+    Returns None (skipped) when numba is not installed.
+    """
+    return numba_backend.check_parity(ranges, _compare_range)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="P_π(n) kernels with an optional Numba backend.")
+    parser.add_argument("--lo", type=int, default=None, help="first n (default 1)")
+    parser.add_argument("--hi", type=int, default=None, help="last n (default 100000)")
+    parser.add_argument("--check-parity", action="store_true",
+                        help="compare the python and numba backends on [lo, hi], "
+                             "or on the fixed PARITY_RANGES when neither is given")
+    parser.add_argument("--backend", choices=BACKENDS + ('auto',), default=None)
+    args = parser.parse_args(argv)
+
+    if args.check_parity:
+        if args.lo is None and args.hi is None:
+            ranges = PARITY_RANGES
+        else:
+            ranges = [(args.lo or 1, args.hi or 100000)]
+        numba_backend.exit_with_parity(check_parity(ranges))
+
+    args.lo = args.lo or 1
+    args.hi = args.hi or 100000
+    backend = resolve_backend(args.backend)
+    values = partition_values(args.lo, args.hi, backend)
+    print(f"Computed {len(values):,} values with the {backend} backend; max P_π = {max(values)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Single-n queries for P_π(n), usable far beyond the computed tables.
+
+n is factored with trial division, Miller-Rabin and Pollard rho; no
+divisor table or trial factor search up to n is needed. When SymPy is
+installed, composite cofactors are split with its elliptic-curve method
+(sympy.ntheory.ecm) instead, which is much faster when n has two or more
+large prime factors.
+
+Level k is decided on the prime multiset. A prime p >= k can always be
+a factor on its own, and attaching small primes to it never adds
+factors, so n splits into k factors >= k exactly when
+
+    #{primes >= k, with multiplicity} + G >= k
+
+where G is the largest number of disjoint groups of the primes below k
+whose products are each >= k. Only the small primes must be known
+exactly; the large primes only have to be counted, so an unfactored
+composite cofactor (all of whose primes exceed TRIAL_LIMIT) is only
+split with Pollard rho when its Ω actually changes the answer.
+
+Feasibility is monotone in k (merging two of k factors >= k gives k-1
+factors >= k-1), so the largest feasible k is found by binary search.
+"""
+
+import math
+import random
+import sys
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from sympy.ntheory import ecm
+except ImportError:
+    ecm = None
+
+TRIAL_LIMIT = 1000
+
+# Pollard rho draws its starting points from its own generator, so it
+# neither depends on nor disturbs the state of the global random module
+_rho_random = random.Random(1000003)
+
+# Deterministic Miller-Rabin for n < 3.3 * 10^24; a strong probable-prime
+# test beyond that.
+_MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def _small_primes(limit: int) -> List[int]:
+    is_comp = bytearray(limit + 1)
+    primes = []
+    for i in range(2, limit + 1):
+        if not is_comp[i]:
+            primes.append(i)
+            is_comp[i * i::i] = b'\x01' * len(range(i * i, limit + 1, i))
+    return primes
+
+
+_SMALL_PRIMES = _small_primes(TRIAL_LIMIT)
+
+
+def is_probable_prime(n: int) -> bool:
+    """Miller-Rabin primality test."""
+    if n < 2:
+        return False
+    for p in _MR_BASES:
+        if n % p == 0:
+            return n == p
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _MR_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def pollard_rho(n: int) -> int:
+    """Return a non-trivial factor of the odd composite n (Brent's variant)."""
+    root = math.isqrt(n)
+    if root * root == n:
+        return root
+    while True:
+        y = _rho_random.randrange(1, n)
+        c = _rho_random.randrange(1, n)
+        m = 128
+        g = q = r = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def _trial_division(n: int) -> Tuple[Dict[int, int], int]:
+    """Strip the primes below TRIAL_LIMIT; return them and the cofactor."""
+    factors = {}
+    for p in _SMALL_PRIMES:
+        if p * p > n:
+            break
+        if n % p == 0:
+            e = 0
+            while n % p == 0:
+                n //= p
+                e += 1
+            factors[p] = e
+    if 1 < n < TRIAL_LIMIT:
+        factors[n] = factors.get(n, 0) + 1
+        n = 1
+    return factors, n
+
+
+def _is_cofactor_prime(m: int) -> bool:
+    # m has no prime factor below TRIAL_LIMIT
+    return m < TRIAL_LIMIT * TRIAL_LIMIT or is_probable_prime(m)
+
+
+def _ecm_split(m: int, factors: Dict[int, int]) -> int:
+    """Move the primes SymPy's ECM finds in m into factors; return what is left."""
+    try:
+        primes = ecm(m)
+    except ValueError:
+        # No factor found within ECM's default bounds
+        return m
+    for p in primes:
+        while m % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            m //= p
+    return m
+
+
+def _split_cofactor(m: int, factors: Dict[int, int]):
+    """Fully factor a cofactor free of primes below TRIAL_LIMIT into factors."""
+    stack = [m]
+    while stack:
+        m = stack.pop()
+        if m == 1:
+            continue
+        if _is_cofactor_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+            continue
+        if ecm is not None:
+            rest = _ecm_split(m, factors)
+            if rest != m:
+                stack.append(rest)
+                continue
+        d = pollard_rho(m)
+        stack.extend((d, m // d))
+
+
+def factorize(n: int) -> Dict[int, int]:
+    """Return the prime factorization of n as {p: exponent}."""
+    factors, cofactor = _trial_division(n)
+    _split_cofactor(cofactor, factors)
+    return factors
+
+
+def max_level(n: int) -> int:
+    """Largest k with k^k <= n (P_π(n) can never exceed it)."""
+    k = 1
+    while (k + 1) ** (k + 1) <= n:
+        k += 1
+    return k
+
+
+def _minimal_groups(primes: List[int], exps: Tuple[int, ...], top: int, k: int):
+    """Yield exponent vectors of groups containing primes[top] with product >= k
+    that drop below k when any other prime is removed."""
+    p_max = primes[top]
+    rest = list(exps)
+    rest[top] -= 1
+    # Minimality forces product / min(group) < k, so the part beside p_max is < k.
+    vector = [0] * len(primes)
+
+    def extend(i, value, smallest):
+        if i < 0:
+            product = p_max * value
+            if product >= k and product // smallest < k:
+                group = vector[:]
+                group[top] += 1
+                yield tuple(group)
+            return
+        p = primes[i]
+        v = value
+        for e in range(rest[i] + 1):
+            if e:
+                v *= p
+                if v >= k:
+                    break
+            vector[i] = e
+            yield from extend(i - 1, v, p if e else smallest)
+        vector[i] = 0
+
+    yield from extend(top, 1, p_max)
+
+
+def _greedy_groups(primes: List[int], exps: Tuple[int, ...], k: int) -> List[int]:
+    """Pack the largest prime with the smallest ones until each group reaches k."""
+    pool = []
+    for p, e in zip(primes, exps):
+        pool.extend([p] * e)
+    groups = []
+    lo, hi = 0, len(pool) - 1
+    while lo <= hi:
+        product = pool[hi]
+        hi -= 1
+        while product < k and lo <= hi:
+            product *= pool[lo]
+            lo += 1
+        if product >= k:
+            groups.append(product)
+    return groups
+
+
+def _cover(primes: List[int], exps: Tuple[int, ...], k: int, need: int,
+           failed: set) -> Optional[List[int]]:
+    """Find `need` disjoint groups of the small primes with products >= k."""
+    if need <= 0:
+        return []
+    total = 1
+    for p, e in zip(primes, exps):
+        total *= p ** e
+    if total < k ** need:
+        return None
+
+    greedy = _greedy_groups(primes, exps, k)
+    if len(greedy) >= need:
+        return greedy[:need]
+
+    key = (exps, need)
+    if key in failed:
+        return None
+    # Leftover primes can join any group, so some group holds the largest
+    # prime; shrinking it to a minimal group keeps the others valid.
+    top = max(i for i, e in enumerate(exps) if e)
+    for group in _minimal_groups(primes, exps, top, k):
+        rest = tuple(e - g for e, g in zip(exps, group))
+        found = _cover(primes, rest, k, need - 1, failed)
+        if found is not None:
+            product = 1
+            for p, g in zip(primes, group):
+                product *= p ** g
+            return [product] + found
+    failed.add(key)
+    return None
+
+
+def _small_part(factorization: Dict[int, int], k: int) -> Tuple[List[int], Tuple[int, ...]]:
+    primes = sorted(p for p in factorization if p < k)
+    return primes, tuple(factorization[p] for p in primes)
+
+
+def _omega_upper(cofactor: int) -> int:
+    # Every prime of an unsplit cofactor is at least TRIAL_LIMIT
+    count = 0
+    power = TRIAL_LIMIT
+    while power <= cofactor:
+        count += 1
+        power *= TRIAL_LIMIT
+    return count
+
+
+def find_partition(n: int, k: int, factorization: Optional[Dict[int, int]] = None) -> Optional[List[int]]:
+    """Return k factors >= k with product n (sorted), or None if none exist."""
+    if k == 1:
+        return [n]
+    if factorization is None:
+        factorization = factorize(n)
+    big = sorted(p for p, e in factorization.items() if p >= k for _ in range(e))
+    primes, exps = _small_part(factorization, k)
+    groups = _cover(primes, exps, k, k - len(big), set())
+    if groups is None:
+        return None
+
+    factors = big + groups
+    if len(factors) > k:
+        factors = factors[:k - 1] + [math.prod(factors[k - 1:])]
+    leftover = n // math.prod(factors)
+    factors[-1] *= leftover
+    return sorted(factors)
+
+
+def partition_value(n: int, factorization: Optional[Dict[int, int]] = None) -> int:
+    """Calculate P_π(n) by binary search over k.
+
+    Without a given factorization, n is trial-divided and a composite
+    cofactor is only split with Pollard rho when its number of prime
+    factors decides a level.
+    """
+    if n <= 1:
+        return 1
+    composites = []
+    if factorization is None:
+        factorization, cofactor = _trial_division(n)
+        if cofactor > 1:
+            if _is_cofactor_prime(cofactor):
+                factorization[cofactor] = factorization.get(cofactor, 0) + 1
+            else:
+                composites.append(cofactor)
+
+    def feasible(k):
+        primes, exps = _small_part(factorization, k)
+        big = sum(e for p, e in factorization.items() if p >= k)
+        if composites:
+            big_lo = big + 2 * len(composites)
+            big_hi = big + sum(_omega_upper(c) for c in composites)
+            if _cover(primes, exps, k, k - big_lo, set()) is not None:
+                return True
+            if _cover(primes, exps, k, k - big_hi, set()) is None:
+                return False
+            # Ω of the cofactors matters here: split them
+            for c in composites:
+                _split_cofactor(c, factorization)
+            composites.clear()
+            return feasible(k)
+        return _cover(primes, exps, k, k - big, set()) is not None
+
+    lo, hi = 1, max_level(n)
+    while lo < hi:
+        k = (lo + hi + 1) // 2
+        if feasible(k):
+            lo = k
+        else:
+            hi = k - 1
+    return lo
+
+
+def optimal_partition(n: int) -> Tuple[int, List[int]]:
+    """Return P_π(n) and one multiset of factors achieving it."""
+    if n <= 1:
+        return 1, [1]
+    factorization = factorize(n)
+    k = partition_value(n, factorization)
+    return k, find_partition(n, k, factorization)
+
+
+def main():
+    values = [int(arg) for arg in sys.argv[1:]] or [10, 11, 63, 64, 256, 10**30 + 7]
+    for n in values:
+        k, factors = optimal_partition(n)
+        print(f"P_π({n}) = {k}: {'*'.join(map(str, factors))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Local asyncio service for batched P_π lookups.
+
+The server memory-maps a saved WitnessStore (levels.npy plus pointers.npy,
+or factors.npy for a store loaded from the C generator's CSV) and
+answers, for every requested n, P_π(n), the transition type of n and one
+optimal factorization. n beyond the table are computed on the fly with
+partition_query and kept in an LRU cache; those batches, and table
+batches of more than INLINE_BATCH numbers, run in a worker thread so
+other connections keep being served.
+
+HTTP over TCP or a Unix socket:
+
+    GET  /pi?n=10,11,12
+    POST /pi            {"n": [10, 11, 12]}
+    GET  /stats
+
+Each answer is {"results": [{"n", "P_pi", "type", "factorization", "source"}]}.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from urllib.request import Request, urlopen
+
+from conjecture_analyzer import classify_transition
+from partition_query import optimal_partition, partition_value
+from witness_store import WitnessStore
+
+MAX_BATCH = 100000
+# Table-only batches up to this size are answered on the event loop
+INLINE_BATCH = 1000
+
+
+class PartitionService:
+    """Lookups against a memory-mapped store with a cached on-the-fly fallback."""
+
+    def __init__(self, store: Optional[WitnessStore] = None, cache_size: int = 100000):
+        self.store = store
+        self.table_max_n = store.max_n if store is not None else 0
+        self.requests = 0
+        self.lookups = 0
+        self._compute = lru_cache(maxsize=cache_size)(self._compute_uncached)
+        self._value = lru_cache(maxsize=cache_size)(partition_value)
+
+    @staticmethod
+    def _compute_uncached(n: int) -> Tuple[int, str]:
+        k, factors = optimal_partition(n)
+        return k, '*'.join(map(str, factors))
+
+    def _from_table(self, n: int) -> Dict:
+        store = self.store
+        p_n = int(store.levels[n])
+        result = {'n': n, 'P_pi': p_n, 'factorization': '*'.join(map(str, store.witness(n))),
+                  'source': 'table'}
+        # P_π(n + 1) for the transition type; the last table entry needs one computed value
+        p_next = int(store.levels[n + 1]) if n < self.table_max_n else self._value(n + 1)
+        result['type'] = classify_transition(p_n, p_next)
+        return result
+
+    def _computed(self, n: int) -> Dict:
+        k, factorization = self._compute(n)
+        return {'n': n, 'P_pi': k, 'factorization': factorization, 'source': 'computed',
+                'type': classify_transition(k, self._value(n + 1))}
+
+    def lookup(self, n: int) -> Dict:
+        if n < 1:
+            raise ValueError(f"n must be positive, got {n}")
+        if n <= self.table_max_n:
+            return self._from_table(n)
+        return self._computed(n)
+
+    async def lookup_batch(self, numbers: List[int]) -> List[Dict]:
+        if len(numbers) > MAX_BATCH:
+            raise ValueError(f"At most {MAX_BATCH} numbers per request")
+        self.requests += 1
+        self.lookups += len(numbers)
+        if len(numbers) <= INLINE_BATCH and all(n <= self.table_max_n for n in numbers):
+            return [self.lookup(n) for n in numbers]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: [self.lookup(n) for n in numbers])
+
+    def stats(self) -> Dict:
+        info = self._compute.cache_info()
+        return {'table_max_n': self.table_max_n, 'requests': self.requests, 'lookups': self.lookups,
+                'cache': {'hits': info.hits, 'misses': info.misses,
+                          'size': info.currsize, 'max_size': info.maxsize}}
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def _parse_numbers(method: str, query: Dict, body: bytes) -> List[int]:
+    if method == 'POST':
+        return [int(n) for n in json.loads(body or b'{}')['n']]
+    return [int(n) for value in query.get('n', []) for n in value.split(',') if n]
+
+
+async def _handle_request(service: PartitionService, method: str, target: str,
+                          body: bytes) -> Tuple[int, Dict]:
+    url = urlsplit(target)
+    if url.path == '/stats':
+        return 200, service.stats()
+    if url.path != '/pi':
+        return 404, {'error': f"unknown path {url.path}"}
+    if method not in ('GET', 'POST'):
+        return 405, {'error': f"method {method} not allowed"}
+    try:
+        numbers = _parse_numbers(method, parse_qs(url.query), body)
+        return 200, {'results': await service.lookup_batch(numbers)}
+    except (ValueError, KeyError, TypeError) as exc:
+        return 400, {'error': str(exc)}
+
+
+async def _serve_connection(service: PartitionService, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter):
+    # Keep-alive: serve requests on the connection until the client closes it
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            body = await reader.readexactly(length) if length else b''
+
+            status, payload = await _handle_request(service, method.upper(), target, body)
+            data = json.dumps(payload).encode()
+            close = headers.get('connection', '').lower() == 'close'
+            writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\n"
+                         f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode() + data)
+            await writer.drain()
+            if close:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service: PartitionService, host: str = '127.0.0.1', port: int = 8765,
+                unix_path: Optional[str] = None):
+    """Serve until cancelled."""
+    handler = lambda reader, writer: _serve_connection(service, reader, writer)
+    if unix_path:
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Serving P_π lookups on {where} (table up to n = {service.table_max_n:,})")
+    async with server:
+        await server.serve_forever()
+
+
+def query(numbers: List[int], url: str = 'http://127.0.0.1:8765') -> List[Dict]:
+    """Client helper: batched lookup against a running server."""
+    request = Request(f"{url}/pi", data=json.dumps({'n': list(numbers)}).encode(),
+                      headers={'Content-Type': 'application/json'})
+    with urlopen(request) as response:
+        return json.loads(response.read())['results']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local batched P_π lookup server.")
+    parser.add_argument("--store", default=None, help="WitnessStore directory (levels.npy with pointers.npy or factors.npy)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--build", type=int, default=None,
+                        help="build and save a store up to this n if --store does not exist")
+    source.add_argument("--csv", default=None,
+                        help="load a C generator CSV (e.g. optimal_partitions_exact_10_5.csv) "
+                             "and save it as --store if that does not exist")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--cache-size", type=int, default=100000,
+                        help="LRU size for values computed beyond the table")
+    args = parser.parse_args(argv)
+
+    store = None
+    if args.store and os.path.isdir(args.store):
+        store = WitnessStore.load(args.store)
+    elif args.store and not (args.build or args.csv):
+        parser.error(f"store directory {args.store!r} does not exist "
+                     f"(pass --build N or --csv FILE to create it)")
+    elif args.csv:
+        store = WitnessStore.from_csv(args.csv)
+        print(f"Loaded {store.max_n:,} rows from {args.csv}")
+        if args.store:
+            store.save(args.store)
+    elif args.build:
+        t0 = time.perf_counter()
+        store = WitnessStore.build(args.build)
+        print(f"Built store up to {args.build:,} in {time.perf_counter() - t0:.1f} s")
+        if args.store:
+            store.save(args.store)
+
+    try:
+        asyncio.run(serve(PartitionService(store, args.cache_size), args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Append-only integer arrays spilled to on-disk segments.
+
+Values are appended into an in-memory array; every `segment_items`
+values the buffer is written to its own file, and full segments are read
+back through read-only memory maps. Only the current buffer and a few
+mapped segments are held at once, so the resident memory of a
+SegmentedArray is bounded no matter how long it grows. It supports len(),
+indexing, slicing and iteration, so code written for lists (bisect,
+sequence[:100], for loops) works unchanged.
+"""
+
+import mmap
+import os
+from array import array
+from collections import OrderedDict
+from typing import List
+
+
+class SegmentedArray:
+    def __init__(self, directory: str, name: str, typecode: str = 'q',
+                 segment_items: int = 1 << 20, base: int = 0, max_open_segments: int = 8):
+        self.directory = directory
+        self.name = name
+        self.typecode = typecode
+        self.segment_items = segment_items
+        # Index i refers to the (i - base)-th appended value
+        self.base = base
+        self.max_open_segments = max_open_segments
+        self._buffer = array(typecode)
+        self._segments: List[str] = []
+        self._open = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, value: int):
+        self._buffer.append(value)
+        if len(self._buffer) >= self.segment_items:
+            self._spill()
+
+    def _spill(self):
+        path = os.path.join(self.directory, f"{self.name}_{len(self._segments):05d}.bin")
+        with open(path, 'wb') as f:
+            self._buffer.tofile(f)
+        self._segments.append(path)
+        self._buffer = array(self.typecode)
+
+    def _segment(self, index: int) -> memoryview:
+        """Memory-mapped view of a spilled segment (least recently used ones are unmapped)."""
+        if index in self._open:
+            self._open.move_to_end(index)
+            return self._open[index][1]
+        with open(self._segments[index], 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped).cast(self.typecode)
+        self._open[index] = (mapped, view)
+        while len(self._open) > self.max_open_segments:
+            _, (old_map, old_view) = self._open.popitem(last=False)
+            old_view.release()
+            old_map.close()
+        return view
+
+    def __len__(self) -> int:
+        return len(self._segments) * self.segment_items + len(self._buffer)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self) + self.base)
+            return [self[j] for j in range(max(start, self.base), stop, step)]
+        if i < 0:
+            i += len(self) + self.base
+        i -= self.base
+        if not 0 <= i < len(self):
+            raise IndexError(f"{self.name} index {i + self.base} out of range")
+        segment, offset = divmod(i, self.segment_items)
+        if segment < len(self._segments):
+            return self._segment(segment)[offset]
+        return self._buffer[offset]
+
+    def __iter__(self):
+        # Copy out in small chunks: the consumer may touch other segments
+        # meanwhile and get this one unmapped
+        for index in range(len(self._segments)):
+            for start in range(0, self.segment_items, 1 << 16):
+                yield from self._segment(index)[start:start + (1 << 16)].tolist()
+        yield from self._buffer[:]
+
+    def close(self):
+        """Unmap all segments (the files are kept)."""
+        for mapped, view in self._open.values():
+            view.release()
+            mapped.close()
+        self._open.clear()
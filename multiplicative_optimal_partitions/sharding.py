@@ -0,0 +1,272 @@
+"""
+Split a P_π range across machines and merge the results.
+
+1. `plan` writes a manifest describing contiguous shards [start, end].
+2. `run` computes one shard (on any node that can read the manifest) and
+   writes shard_NNNN.csv with shard-local sequence indices plus
+   shard_NNNN.json with its counters and boundary P_π values.
+3. `merge` renumbers the sequence indices globally and resolves the
+   transition at every shard boundary in one streaming pass over the
+   shard CSVs, producing the same columns as the C generator.
+
+A shard never computes P_π beyond its range (except the last shard,
+which needs P_π(end + 1)): the type of its last n depends on the next
+shard's first value and is written as 'pending' until the merge.
+`local` runs every missing shard in local processes standing in for nodes.
+"""
+
+import argparse
+import json
+import math
+import os
+from multiprocessing import Pool
+from typing import Dict, List, Optional
+
+from background_writer import BackgroundWriter
+from conjecture_analyzer import SEQUENCE_TYPES, classify_transition
+from partition_query import find_partition, partition_value
+from window_analyzer import base_primes, segmented_factorizations
+
+CSV_HEADER = "n,P_pi(n),Factorization,SequenceType,SequenceIndex"
+PENDING = 'pending'
+MANIFEST_VERSION = 1
+
+
+# ---------------------------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------------------------
+
+def create_manifest(start: int, end: int, num_shards: int, directory: str) -> Dict:
+    """Split [start, end] into num_shards contiguous shards of near-equal size."""
+    if start < 1 or end < start:
+        raise ValueError(f"Invalid range [{start}, {end}]")
+    num_shards = max(1, min(num_shards, end - start + 1))
+    size = end - start + 1
+    shards = []
+    for i in range(num_shards):
+        lo = start + size * i // num_shards
+        hi = start + size * (i + 1) // num_shards - 1
+        shards.append({'id': i, 'start': lo, 'end': hi,
+                       'csv': f"shard_{i:04d}.csv", 'summary': f"shard_{i:04d}.json"})
+    return {'version': MANIFEST_VERSION, 'start': start, 'end': end,
+            'directory': os.path.abspath(directory), 'shards': shards}
+
+
+def save_manifest(manifest: Dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_manifest(path: str) -> Dict:
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {path}")
+    expected = manifest['start']
+    for shard in manifest['shards']:
+        if shard['start'] != expected or shard['end'] < shard['start']:
+            raise ValueError(f"Manifest {path}: shard {shard['id']} does not continue at n = {expected}")
+        expected = shard['end'] + 1
+    if expected != manifest['end'] + 1:
+        raise ValueError(f"Manifest {path}: shards do not cover [{manifest['start']}, {manifest['end']}]")
+    return manifest
+
+
+def _shard_path(manifest: Dict, shard: Dict, key: str) -> str:
+    return os.path.join(manifest['directory'], shard[key])
+
+
+# ---------------------------------------------------------------------------
+# Per-shard computation
+# ---------------------------------------------------------------------------
+
+def _iter_partitions(lo: int, hi: int, segment_size: int):
+    """Yield (n, P_π(n), factors) for n in [lo, hi], factoring with a segmented sieve."""
+    primes = base_primes(math.isqrt(hi))
+    for seg_lo in range(lo, hi + 1, segment_size):
+        seg_hi = min(seg_lo + segment_size - 1, hi)
+        for offset, factorization in enumerate(segmented_factorizations(seg_lo, seg_hi, primes)):
+            n = seg_lo + offset
+            k = partition_value(n, factorization)
+            yield n, k, find_partition(n, k, factorization)
+
+
+def run_shard(manifest: Dict, shard_id: int, segment_size: int = 1 << 16) -> Dict:
+    """Compute one shard and write its CSV and summary; returns the summary."""
+    shard = manifest['shards'][shard_id]
+    start, end = shard['start'], shard['end']
+    is_last = shard_id == len(manifest['shards']) - 1
+    csv_path = _shard_path(manifest, shard, 'csv')
+    summary_path = _shard_path(manifest, shard, 'summary')
+    os.makedirs(manifest['directory'], exist_ok=True)
+
+    counts = {name: 0 for name in SEQUENCE_TYPES}
+    first_value = last_value = next_value = None
+    previous = None
+
+    def emit(row, p_next):
+        n, p_n, factors = row
+        seq_type = classify_transition(p_n, p_next)
+        counts[seq_type] += 1
+        writer.write((n, p_n, '*'.join(map(str, factors)), seq_type, counts[seq_type]))
+
+    # The last shard also computes P_π(end + 1) to classify its last n
+    values = _iter_partitions(start, end + 1 if is_last else end, segment_size)
+    with BackgroundWriter(csv_path, header=CSV_HEADER) as writer:
+        for row in values:
+            n, p_n, _ = row
+            if n > end:
+                next_value = p_n
+                break
+            if first_value is None:
+                first_value = p_n
+            if previous is not None:
+                emit(previous, p_n)
+            previous = row
+            last_value = p_n
+        if next_value is not None:
+            emit(previous, next_value)
+        else:
+            # Resolved by the merge from the next shard's first value
+            writer.write((previous[0], previous[1], '*'.join(map(str, previous[2])), PENDING, 0))
+
+    summary = {'id': shard_id, 'start': start, 'end': end, 'counts': counts,
+               'first_value': first_value, 'last_value': last_value,
+               'next_value': next_value}
+    # Write the summary last and atomically: its presence marks the shard complete
+    tmp_path = summary_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, summary_path)
+    return summary
+
+
+def load_summary(manifest: Dict, shard: Dict) -> Optional[Dict]:
+    """Summary of a completed shard, or None if it has not finished."""
+    path = _shard_path(manifest, shard, 'summary')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        summary = json.load(f)
+    if (summary['start'], summary['end']) != (shard['start'], shard['end']):
+        raise ValueError(f"{path} covers [{summary['start']}, {summary['end']}], "
+                         f"manifest expects [{shard['start']}, {shard['end']}]")
+    return summary
+
+
+def _run_shard_task(task):
+    manifest, shard_id, segment_size = task
+    run_shard(manifest, shard_id, segment_size)
+    return shard_id
+
+
+def run_local(manifest: Dict, workers: Optional[int] = None, segment_size: int = 1 << 16) -> List[int]:
+    """Run every shard without a summary in local processes; returns the shard ids run."""
+    missing = [shard['id'] for shard in manifest['shards'] if load_summary(manifest, shard) is None]
+    tasks = [(manifest, shard_id, segment_size) for shard_id in missing]
+    with Pool(workers or os.cpu_count() or 1) as pool:
+        for shard_id in pool.imap_unordered(_run_shard_task, tasks):
+            print(f"Shard {shard_id} done")
+    return missing
+
+
+# ---------------------------------------------------------------------------
+# Merge
+# ---------------------------------------------------------------------------
+
+def merge_shards(manifest: Dict, output: str) -> Dict[str, int]:
+    """Merge all shard CSVs into one CSV with global sequence indices.
+
+    Returns the global counts per sequence type.
+    """
+    shards = manifest['shards']
+    summaries = []
+    for shard in shards:
+        summary = load_summary(manifest, shard)
+        if summary is None:
+            raise FileNotFoundError(f"Shard {shard['id']} [{shard['start']}, {shard['end']}] "
+                                    "has not been computed")
+        summaries.append(summary)
+
+    # Boundary transitions: the last n of shard i is classified with the
+    # first value of shard i + 1. Fold them into per-shard counts first so
+    # the index offsets are known before streaming.
+    last_types = []
+    for i, summary in enumerate(summaries):
+        if summary['next_value'] is not None:
+            p_next = summary['next_value']
+            if i + 1 < len(summaries) and p_next != summaries[i + 1]['first_value']:
+                raise ValueError(f"Shard {i} and shard {i + 1} disagree on "
+                                 f"P_π({summary['end'] + 1})")
+            last_types.append(None)
+        else:
+            if i + 1 == len(summaries):
+                raise ValueError(f"Last shard {i} has no P_π({summary['end'] + 1})")
+            seq_type = classify_transition(summary['last_value'], summaries[i + 1]['first_value'])
+            summary['counts'][seq_type] += 1
+            last_types.append(seq_type)
+
+    totals = {name: 0 for name in SEQUENCE_TYPES}
+    with BackgroundWriter(output, formatter=lambda line: line, header=CSV_HEADER) as writer:
+        for shard, summary, last_type in zip(shards, summaries, last_types):
+            offsets = dict(totals)
+            with open(_shard_path(manifest, shard, 'csv')) as f:
+                if f.readline().rstrip("\n") != CSV_HEADER:
+                    raise ValueError(f"Unexpected header in {shard['csv']}")
+                for line in f:
+                    n, p_n, factors, seq_type, index = line.rstrip("\n").split(",")
+                    if seq_type == PENDING:
+                        seq_type = last_type
+                        index = summary['counts'][seq_type]
+                    writer.write(f"{n},{p_n},{factors},{seq_type},{offsets[seq_type] + int(index)}\n")
+            for name in SEQUENCE_TYPES:
+                totals[name] += summary['counts'][name]
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded P_π range computation.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    plan = sub.add_parser("plan", help="write a shard manifest")
+    plan.add_argument("start", type=int)
+    plan.add_argument("end", type=int)
+    plan.add_argument("--shards", type=int, required=True)
+    plan.add_argument("--dir", default="shards", help="directory for the manifest and shard outputs")
+
+    run = sub.add_parser("run", help="compute one shard")
+    run.add_argument("manifest")
+    run.add_argument("shard", type=int)
+    run.add_argument("--segment-size", type=int, default=1 << 16)
+
+    local = sub.add_parser("local", help="compute all missing shards in local processes")
+    local.add_argument("manifest")
+    local.add_argument("--workers", type=int, default=None)
+    local.add_argument("--segment-size", type=int, default=1 << 16)
+
+    merge = sub.add_parser("merge", help="merge completed shards into one CSV")
+    merge.add_argument("manifest")
+    merge.add_argument("output")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        os.makedirs(args.dir, exist_ok=True)
+        manifest = create_manifest(args.start, args.end, args.shards, args.dir)
+        path = os.path.join(args.dir, "manifest.json")
+        save_manifest(manifest, path)
+        print(f"Manifest with {len(manifest['shards'])} shards saved to {path}")
+    elif args.command == "run":
+        summary = run_shard(load_manifest(args.manifest), args.shard, args.segment_size)
+        print(f"Shard {args.shard} [{summary['start']:,}, {summary['end']:,}] done: {summary['counts']}")
+    elif args.command == "local":
+        run_local(load_manifest(args.manifest), args.workers, args.segment_size)
+    else:
+        totals = merge_shards(load_manifest(args.manifest), args.output)
+        print(f"Merged CSV saved to {args.output}")
+        for name in SEQUENCE_TYPES:
+            print(f"{name.capitalize():9s}: {totals[name]:,}")
+
+
+if __name__ == "__main__":
+    main()
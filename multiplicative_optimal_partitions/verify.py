@@ -0,0 +1,348 @@
+"""
+Sampled cross-verification of the P_π implementations.
+
+Every checked n is evaluated by all available engines
+
+    query          partition_query.partition_value
+    analyzer       StatisticalConjectureAnalyzer.partition_function
+    graphs         PartitionAnalyzer.partition_function (basic_graphs.py)
+    T_of           factor_ge_n_factor/count_le_n.py
+    best_multiset  factor_ge_n_factor/f_n.py
+    kernels        partition_kernels (Numba backend, when installed)
+
+and looked up in every stored dataset (C generator / sharded CSVs, read by
+binary search on byte offsets, and WitnessStore directories), whose
+factorizations are checked as well. The checked n are stratified random
+samples per decade plus the hard cases: perfect powers, k^k boundaries and
+highly composite numbers (with their neighbours). Chunks run in parallel
+and the run stops at the first disagreement, which is shrunk to the
+smallest disagreeing divisor and printed as a one-line reproducer.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from multiprocessing import Pool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from partition_query import factorize, max_level, partition_value
+
+FACTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'factor_ge_n_factor')
+DEFAULT_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'optimal_partitions_exact_10_5.csv')
+ENGINES = ('query', 'analyzer', 'graphs', 'T_of', 'best_multiset', 'kernels')
+
+
+# ---------------------------------------------------------------------------
+# Engines
+# ---------------------------------------------------------------------------
+
+def _divisors(n: int) -> List[int]:
+    divisors = [1]
+    for p, e in factorize(n).items():
+        divisors = [d * p ** i for d in divisors for i in range(e + 1)]
+    return sorted(divisors)
+
+
+def divisor_table(n: int) -> Dict[int, List[int]]:
+    """The factors >= 2 of every divisor of n: all that T_of/best_multiset_for look up for n."""
+    divisors = _divisors(n)
+    table = {}
+    for d in divisors:
+        table[d] = [e for e in divisors[1:] if e <= d and d % e == 0]
+    return table
+
+
+def _load_engine(name: str) -> Optional[Callable[[int], int]]:
+    """Return a function n -> P_π(n) for the engine, or None if unavailable."""
+    if name == 'query':
+        return partition_value
+    if name == 'analyzer':
+        from conjecture_analyzer import StatisticalConjectureAnalyzer
+        analyzer = StatisticalConjectureAnalyzer(max_n=0)
+        # Bypass the lru_cache so long runs do not grow it
+        return lambda n: StatisticalConjectureAnalyzer.partition_function.__wrapped__(analyzer, n)
+    if name == 'graphs':
+        from basic_graphs import PartitionAnalyzer
+        analyzer = PartitionAnalyzer(max_n=0)
+        return lambda n: PartitionAnalyzer.partition_function.__wrapped__(analyzer, n)
+    if name in ('T_of', 'best_multiset'):
+        if FACTOR_DIR not in sys.path:
+            sys.path.append(FACTOR_DIR)
+        try:
+            if name == 'T_of':
+                from count_le_n import T_of
+                return lambda n: T_of(n, divisor_table(n))
+            from f_n import best_multiset_for
+            return lambda n: best_multiset_for(n, divisor_table(n))[0]
+        except ImportError:
+            return None
+    if name == 'kernels':
+        import partition_kernels
+        if not partition_kernels.NUMBA_AVAILABLE:
+            return None
+        return lambda n: partition_kernels.partition_value(n, 'numba')
+    raise ValueError(f"Unknown engine {name!r}; expected one of {ENGINES}")
+
+
+# ---------------------------------------------------------------------------
+# Stored datasets
+# ---------------------------------------------------------------------------
+
+class CsvDataset:
+    """Random access to a CSV with rows sorted by n (n,P_pi(n),Factorization,...)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = f"csv:{os.path.basename(path)}"
+        self._file = open(path, 'rb')
+        self.size = os.path.getsize(path)
+        self.max_n = self._last_n()
+
+    def _row_after(self, offset: int) -> Optional[Tuple[int, List[str]]]:
+        """(n, fields) of the first data row starting after offset (at 0: the first row)."""
+        self._file.seek(offset)
+        if offset:
+            self._file.readline()
+        while True:
+            line = self._file.readline()
+            if not line:
+                return None
+            fields = line.decode().rstrip("\r\n").split(",")
+            if fields[0].isdigit():
+                return int(fields[0]), fields
+
+    def _last_n(self) -> int:
+        self._file.seek(max(0, self.size - 4096))
+        for line in reversed(self._file.read().splitlines()):
+            if line[:1].isdigit():
+                return int(line.split(b",")[0])
+        return 0
+
+    def lookup(self, n: int) -> Optional[Tuple[int, Optional[str]]]:
+        """(P_π(n), factorization) or None if n is not in the file."""
+        # Smallest offset whose next row has an n' >= n
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = self._row_after(mid)
+            if row is None or row[0] >= n:
+                hi = mid
+            else:
+                lo = mid + 1
+        row = self._row_after(lo)
+        if row is None or row[0] != n:
+            return None
+        fields = row[1]
+        return int(fields[1]), fields[2] if len(fields) > 2 else None
+
+
+class StoreDataset:
+    """A saved WitnessStore directory (levels.npy with pointers.npy or factors.npy)."""
+
+    def __init__(self, path: str):
+        from witness_store import WitnessStore
+        self.name = f"store:{os.path.basename(os.path.normpath(path))}"
+        self.store = WitnessStore.load(path)
+        self.max_n = self.store.max_n
+
+    def lookup(self, n: int) -> Optional[Tuple[int, Optional[str]]]:
+        if n > self.max_n:
+            return None
+        return self.store.partition_value(n), '*'.join(map(str, self.store.witness(n)))
+
+
+def open_dataset(path: str):
+    return StoreDataset(path) if os.path.isdir(path) else CsvDataset(path)
+
+
+def _witness_problem(n: int, k: int, factorization: Optional[str]) -> Optional[str]:
+    if factorization is None:
+        return None
+    factors = [int(f) for f in factorization.split("*")]
+    if math.prod(factors) != n or len(factors) != k or min(factors) < k:
+        return f"invalid factorization {factorization} for P_π = {k}"
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Sampling
+# ---------------------------------------------------------------------------
+
+def stratified_samples(max_n: int, per_stratum: int, seed: int) -> List[int]:
+    """per_stratum random n from every decade [10^d, 10^(d+1)) up to max_n."""
+    rng = random.Random(seed)
+    samples = []
+    lo = 1
+    while lo <= max_n:
+        hi = min(lo * 10 - 1, max_n)
+        samples.extend(rng.randint(lo, hi) for _ in range(min(per_stratum, hi - lo + 1)))
+        lo *= 10
+    return samples
+
+
+def highly_composite_numbers(max_n: int) -> List[int]:
+    """Numbers <= max_n with more divisors than every smaller number."""
+    primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53]
+    candidates = []
+
+    def extend(i, value, divisors, max_exp):
+        candidates.append((value, divisors))
+        if i == len(primes):
+            return
+        v = value
+        for e in range(1, max_exp + 1):
+            v *= primes[i]
+            if v > max_n:
+                break
+            extend(i + 1, v, divisors * (e + 1), e)
+
+    extend(0, 1, 1, max_n.bit_length())
+    result = []
+    record = 0
+    for value, divisors in sorted(candidates):
+        if divisors > record:
+            result.append(value)
+            record = divisors
+    return result
+
+
+def hard_cases(max_n: int) -> List[int]:
+    """Perfect powers, k^k boundaries and highly composite numbers (with n ± 1)."""
+    cases = set()
+    for e in range(2, max_n.bit_length() + 1):
+        b = 2
+        while b ** e <= max_n:
+            cases.add(b ** e)
+            b += 1
+    for k in range(2, max_level(max_n) + 2):
+        cases.update((k ** k - 1, k ** k, k ** k + 1))
+    for n in highly_composite_numbers(max_n):
+        cases.update((n - 1, n, n + 1))
+    return sorted(n for n in cases if 1 <= n <= max_n)
+
+
+# ---------------------------------------------------------------------------
+# Checking
+# ---------------------------------------------------------------------------
+
+_worker_engines: Dict[str, Callable[[int], int]] = {}
+_worker_datasets: List = []
+
+
+def _init_worker(engine_names: List[str], dataset_paths: List[str]):
+    _worker_engines.clear()
+    for name in engine_names:
+        engine = _load_engine(name)
+        if engine is not None:
+            _worker_engines[name] = engine
+    _worker_datasets[:] = [open_dataset(path) for path in dataset_paths]
+
+
+def check_n(n: int, engines: Dict[str, Callable[[int], int]], datasets: List) -> Optional[Dict]:
+    """Evaluate n everywhere; return a report if anything disagrees."""
+    values = {name: engine(n) for name, engine in engines.items()}
+    problems = []
+    for dataset in datasets:
+        found = dataset.lookup(n)
+        if found is None:
+            continue
+        values[dataset.name] = found[0]
+        problem = _witness_problem(n, found[0], found[1])
+        if problem:
+            problems.append(f"{dataset.name}: {problem}")
+    if len(set(values.values())) > 1 or problems:
+        return {'n': n, 'values': values, 'problems': problems}
+    return None
+
+
+def _check_chunk(chunk: List[int]) -> Tuple[int, Optional[Dict]]:
+    for n in chunk:
+        report = check_n(n, _worker_engines, _worker_datasets)
+        if report is not None:
+            return len(chunk), report
+    return len(chunk), None
+
+
+def shrink(report: Dict, engines: Dict[str, Callable[[int], int]], datasets: List) -> Dict:
+    """Replace a failing n by its smallest divisor that still fails."""
+    for d in _divisors(report['n']):
+        smaller = check_n(d, engines, datasets)
+        if smaller is not None:
+            return smaller
+    return report
+
+
+def verify(numbers: List[int], engine_names=ENGINES, dataset_paths: List[str] = (),
+           workers: Optional[int] = None, chunk_size: int = 64, verbose: bool = True) -> Optional[Dict]:
+    """Check numbers in parallel; return the (shrunk) first disagreement or None."""
+    engine_names, dataset_paths = list(engine_names), list(dataset_paths)
+    chunks = [numbers[i:i + chunk_size] for i in range(0, len(numbers), chunk_size)]
+    checked = 0
+    report = None
+    with Pool(workers or os.cpu_count() or 1, _init_worker, (engine_names, dataset_paths)) as pool:
+        for size, found in pool.imap_unordered(_check_chunk, chunks):
+            checked += size
+            if found is not None:
+                report = found
+                break
+    # Leaving the with block terminates the pool: nothing else is checked
+    if report is None:
+        if verbose:
+            print(f"All engines and datasets agree on {checked:,} numbers")
+        return None
+    _init_worker(engine_names, dataset_paths)
+    return shrink(report, _worker_engines, _worker_datasets)
+
+
+def print_report(report: Dict, dataset_paths: List[str]):
+    n = report['n']
+    print(f"\nDISAGREEMENT at n = {n}:")
+    for name, value in sorted(report['values'].items()):
+        print(f"  {name:24s} P_π = {value}")
+    for problem in report['problems']:
+        print(f"  {problem}")
+    datasets = "".join(f" --dataset {path}" for path in dataset_paths)
+    print(f"Reproduce: python verify.py --n {n}{datasets}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-check the P_π engines and stored datasets.")
+    parser.add_argument("--max-n", type=int, default=None,
+                        help="sample up to this n (default: largest n in the datasets, else 10^6)")
+    parser.add_argument("--per-stratum", type=int, default=200, help="random samples per decade")
+    parser.add_argument("--no-hard", action="store_true", help="skip perfect powers, k^k and HCN cases")
+    parser.add_argument("--n", type=int, nargs="*", default=None, help="check exactly these n")
+    parser.add_argument("--engines", nargs="*", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--dataset", action="append", default=None,
+                        help="CSV file or WitnessStore directory (default: the shipped 10^5 CSV)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    dataset_paths = args.dataset
+    if dataset_paths is None:
+        dataset_paths = [DEFAULT_DATASET] if os.path.exists(DEFAULT_DATASET) else []
+
+    if args.n:
+        numbers = args.n
+    else:
+        max_n = args.max_n
+        if max_n is None:
+            max_n = max((open_dataset(path).max_n for path in dataset_paths), default=10 ** 6)
+        numbers = stratified_samples(max_n, args.per_stratum, args.seed)
+        if not args.no_hard:
+            numbers += hard_cases(max_n)
+        print(f"Checking {len(numbers):,} numbers up to {max_n:,} with engines "
+              f"{', '.join(args.engines)} and {len(dataset_paths)} dataset(s)")
+
+    report = verify(numbers, args.engines, dataset_paths, args.workers)
+    if report is not None:
+        print_report(report, dataset_paths)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
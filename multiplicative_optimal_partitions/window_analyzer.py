@@ -0,0 +1,130 @@
+"""
+P_π(n) over a window [a, b] far from 1.
+
+The window is factored with a segmented sieve over the primes <= sqrt(b+1)
+(whatever is left after dividing them out is a single prime), and each
+factorization is passed straight to partition_query.partition_value.
+The cost grows with the window size b - a, not with b itself.
+"""
+
+import argparse
+import math
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+from conjecture_analyzer import SEQUENCE_TYPES, classify_transition
+from partition_query import partition_value
+
+
+def base_primes(limit: int) -> List[int]:
+    """Return list of all primes <= limit via a Sieve of Eratosthenes."""
+    is_comp = bytearray(limit + 1)
+    primes = []
+    for i in range(2, limit + 1):
+        if not is_comp[i]:
+            primes.append(i)
+            start = i * i
+            if start <= limit:
+                is_comp[start::i] = b'\x01' * (((limit - start) // i) + 1)
+    return primes
+
+
+def segmented_factorizations(lo: int, hi: int, primes: List[int]) -> List[Dict[int, int]]:
+    """Factor every n in [lo, hi] with the given primes (which must cover sqrt(hi))."""
+    remaining = list(range(lo, hi + 1))
+    factorizations = [{} for _ in remaining]
+    for p in primes:
+        if p * p > hi:
+            break
+        start = ((lo + p - 1) // p) * p
+        for i in range(start - lo, hi - lo + 1, p):
+            m = remaining[i] // p
+            e = 1
+            while m % p == 0:
+                m //= p
+                e += 1
+            remaining[i] = m
+            factorizations[i][p] = e
+    for i, m in enumerate(remaining):
+        if m > 1:
+            factorizations[i][m] = 1
+    return factorizations
+
+
+class WindowedPartitionAnalyzer:
+    def __init__(self, a: int, b: int, segment_size: int = 1 << 16):
+        if a < 1 or b < a:
+            raise ValueError(f"Invalid window [{a}, {b}]")
+        self.a = a
+        self.b = b
+        self.segment_size = segment_size
+        # values[i] = P_π(a + i) for i = 0..b-a+1 (one past b to classify b)
+        self.values = array('b')
+        # types[i] = index into SEQUENCE_TYPES for m = a + i, i = 0..b-a
+        self.types = array('b')
+        self.counts = {name: 0 for name in SEQUENCE_TYPES}
+        self.level_counts: Dict[int, int] = {}
+
+    def iter_values(self) -> Iterator[Tuple[int, int]]:
+        """Yield (n, P_π(n)) for n in [a, b+1], one sieve segment at a time."""
+        hi_total = self.b + 1
+        primes = base_primes(math.isqrt(hi_total))
+        for lo in range(self.a, hi_total + 1, self.segment_size):
+            hi = min(lo + self.segment_size - 1, hi_total)
+            for offset, factorization in enumerate(segmented_factorizations(lo, hi, primes)):
+                n = lo + offset
+                yield n, partition_value(n, factorization)
+
+    def compute(self):
+        """Compute P_π values, transition types and counts for the window."""
+        print(f"Computing P_π(n) for window [{self.a:,}, {self.b:,}]...")
+        type_index = {name: i for i, name in enumerate(SEQUENCE_TYPES)}
+        p_prev = None
+        for n, p_n in self.iter_values():
+            self.values.append(p_n)
+            if p_prev is not None:
+                seq_type = classify_transition(p_prev, p_n)
+                self.types.append(type_index[seq_type])
+                self.counts[seq_type] += 1
+                self.level_counts[p_prev] = self.level_counts.get(p_prev, 0) + 1
+            p_prev = p_n
+
+    def transitions(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield (m, P_π(m), sequence type) for m in [a, b]."""
+        for i, t in enumerate(self.types):
+            yield self.a + i, self.values[i], SEQUENCE_TYPES[t]
+
+    def densities(self) -> Dict[str, float]:
+        """Local densities of the three transition types in the window."""
+        size = self.b - self.a + 1
+        densities = {name: self.counts[name] / size for name in SEQUENCE_TYPES}
+        densities['relation_minus'] = 2 * densities['decrease'] + densities['equality']
+        densities['relation_plus'] = 2 * densities['increase'] + densities['equality']
+        return densities
+
+    def print_statistics(self):
+        densities = self.densities()
+        print(f"\nWindow [{self.a:,}, {self.b:,}] ({self.b - self.a + 1:,} values):")
+        for name in SEQUENCE_TYPES:
+            print(f"{name.capitalize():9s}: {self.counts[name]:,} (density {densities[name]:.6f})")
+        print(f"2C^(-) + C^(0) (local): {densities['relation_minus']:.6f}")
+        print(f"2C^(+) + C^(0) (local): {densities['relation_plus']:.6f}")
+        print("\nFrequency by partition level:")
+        for level in sorted(self.level_counts):
+            print(f"P_π(n) = {level}: {self.level_counts[level]:,}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="P_π(n) statistics over a window [a, b].")
+    parser.add_argument("a", type=int, help="window start")
+    parser.add_argument("b", type=int, help="window end (inclusive)")
+    parser.add_argument("--segment-size", type=int, default=1 << 16)
+    args = parser.parse_args(argv)
+
+    analyzer = WindowedPartitionAnalyzer(args.a, args.b, args.segment_size)
+    analyzer.compute()
+    analyzer.print_statistics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Optimal factorizations (witnesses) for every n in [1, N] in one pass.
+
+For each level t the sieve computes G_t(n) = the largest number (capped
+at t) of factors >= t with product n, together with a back-pointer: the
+factor f <= sqrt(n) that achieved it, so that G_t(n / f) = G_t(n) - 1.
+P_π(n) is the largest t with G_t(n) = t, and a witness is rebuilt in
+O(k) by following k - 1 back-pointers at level k and keeping what is
+left as the last factor.
+
+Everything lives in two numpy arrays: levels[n] = P_π(n) (int8) and
+pointers[t - 2, n] (uint16 for N < 2^32), i.e. about 2 * (K - 1) bytes
+per n for K = max P_π(n), instead of one Python list per n.
+
+A store can also be loaded from a CSV written by the C generator
+(WitnessStore.from_csv); it then keeps that file's factorizations
+verbatim in factors[n, :k] instead of back-pointers.
+"""
+
+import argparse
+import math
+import os
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from background_writer import BackgroundWriter
+from conjecture_analyzer import SEQUENCE_TYPES, classify_transition
+from partition_query import max_level
+
+
+def _level_sieve(N: int, t: int, pointers: np.ndarray) -> np.ndarray:
+    """Fill pointers (for level t) and return G_t(n) for n = 0..N."""
+    # Every n >= t is one factor >= t by itself (pointer 0)
+    G = np.zeros(N + 1, np.uint8)
+    G[t:] = 1
+    for _ in range(t):
+        changed = False
+        for f in range(t, math.isqrt(N) + 1):
+            # n = f * m with f <= m, i.e. f is the smallest factor of the split
+            m_hi = N // f
+            candidate = np.minimum(G[f:m_hi + 1] + 1, t).astype(np.uint8)
+            target = G[f * f::f]
+            better = candidate > target
+            if better.any():
+                target[better] = candidate[better]
+                pointers[f * f::f][better] = f
+                changed = True
+        if not changed:
+            break
+    return G
+
+
+def _last_csv_n(path: str) -> int:
+    """n of the last data row of a CSV sorted by n."""
+    with open(path, 'rb') as f:
+        f.seek(max(0, os.path.getsize(path) - 4096))
+        for line in reversed(f.read().splitlines()):
+            if line[:1].isdigit():
+                return int(line.split(b",")[0])
+    return 0
+
+
+class WitnessStore:
+    """P_π(n) and back-pointers (or stored factorizations) for n in [1, N]."""
+
+    def __init__(self, levels: np.ndarray, pointers: Optional[np.ndarray] = None,
+                 factors: Optional[np.ndarray] = None):
+        if pointers is None and factors is None:
+            raise ValueError("A WitnessStore needs pointers or factors")
+        self.levels = levels
+        self.pointers = pointers
+        self.factors = factors
+        self.max_n = len(levels) - 1
+
+    @classmethod
+    def build(cls, N: int, verbose: bool = False) -> "WitnessStore":
+        K = max_level(N)
+        dtype = np.uint16 if math.isqrt(N) < 2 ** 16 else np.uint32
+        levels = np.ones(N + 1, np.int8)
+        pointers = np.zeros((max(K - 1, 0), N + 1), dtype)
+        for t in range(2, K + 1):
+            G = _level_sieve(N, t, pointers[t - 2])
+            levels[G == t] = t
+            if verbose:
+                print(f"Level {t}: {int(np.count_nonzero(G == t)):,} n with P_π(n) >= {t}")
+        levels[0] = 0
+        return cls(levels, pointers)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "WitnessStore":
+        """Load n,P_pi(n),Factorization,... rows for n = 1..N (C generator output).
+
+        The factorizations are kept as they are in the file, so lookups
+        return the same witness as the CSV.
+        """
+        N = _last_csv_n(path)
+        K = max(max_level(N), 1)
+        levels = np.zeros(N + 1, np.int8)
+        factors = np.zeros((N + 1, K), np.uint32 if N < 2 ** 32 else np.uint64)
+        rows = 0
+        with open(path) as f:
+            for line_number, line in enumerate(f, 1):
+                fields = line.rstrip("\r\n").split(",")
+                if not fields[0].isdigit():
+                    continue
+                n, k = int(fields[0]), int(fields[1])
+                row = [int(x) for x in fields[2].split("*")]
+                if not 1 <= n <= N or len(row) != k or math.prod(row) != n:
+                    raise ValueError(f"{path}:{line_number}: invalid row for n = {n}")
+                levels[n] = k
+                factors[n, :k] = sorted(row)
+                rows += 1
+        if rows != N or np.any(levels[1:] == 0):
+            raise ValueError(f"{path} does not cover every n in [1, {N}]")
+        return cls(levels, factors=factors)
+
+    def _check_range(self, n: int):
+        if not 1 <= n <= self.max_n:
+            raise ValueError(f"n = {n} is outside the store's range [1, {self.max_n}]")
+
+    def partition_value(self, n: int) -> int:
+        self._check_range(n)
+        return int(self.levels[n])
+
+    def witness(self, n: int) -> List[int]:
+        """Sorted factors of one optimal partition of n (k = P_π(n) factors >= k)."""
+        self._check_range(n)
+        k = int(self.levels[n])
+        if self.factors is not None:
+            return [int(f) for f in self.factors[n, :k]]
+        if k == 1:
+            return [n]
+        row = self.pointers[k - 2]
+        factors = []
+        for _ in range(k - 1):
+            f = int(row[n])
+            factors.append(f)
+            n //= f
+        factors.append(n)
+        return sorted(factors)
+
+    def iter_rows(self) -> Iterator[Tuple[int, int, str, str, int]]:
+        """Yield (n, P_π(n), factorization, sequence type, sequence index) for n < N."""
+        counters = {name: 0 for name in SEQUENCE_TYPES}
+        for n in range(1, self.max_n):
+            p_n = int(self.levels[n])
+            seq_type = classify_transition(p_n, int(self.levels[n + 1]))
+            counters[seq_type] += 1
+            yield n, p_n, '*'.join(map(str, self.witness(n))), seq_type, counters[seq_type]
+
+    def export_csv(self, filename: str, batch_size: int = 10000):
+        """Write the same columns as the C generator for n = 1..N-1."""
+        with BackgroundWriter(filename, header="n,P_pi(n),Factorization,SequenceType,SequenceIndex",
+                              batch_size=batch_size) as writer:
+            writer.write_rows(self.iter_rows())
+        print(f"Witness CSV saved to {filename}")
+
+    def save(self, directory: str):
+        """Save as levels.npy and pointers.npy or factors.npy (loadable memory-mapped)."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "levels.npy"), self.levels)
+        for name in ("pointers", "factors"):
+            array = getattr(self, name)
+            if array is not None:
+                np.save(os.path.join(directory, f"{name}.npy"), array)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "WitnessStore":
+        mode = 'r' if mmap else None
+        arrays = {}
+        for name in ("levels", "pointers", "factors"):
+            path = os.path.join(directory, f"{name}.npy")
+            if os.path.exists(path):
+                arrays[name] = np.load(path, mmap_mode=mode)
+        return cls(**arrays)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimal factorizations for every n <= N.")
+    parser.add_argument("N", type=int, nargs="?", default=None)
+    parser.add_argument("--from-csv", default=None,
+                        help="load the store from a C generator CSV instead of building it up to N")
+    parser.add_argument("--csv", default=None, help="write n,P_pi(n),Factorization,... for n < N")
+    parser.add_argument("--save", default=None, help="directory for levels.npy and pointers.npy")
+    parser.add_argument("--show", type=int, nargs="*", default=[], help="print the witness of these n")
+    args = parser.parse_args(argv)
+    if (args.N is None) == (args.from_csv is None):
+        parser.error("give either N or --from-csv")
+    max_n = args.N if args.from_csv is None else _last_csv_n(args.from_csv)
+    outside = [n for n in args.show if not 1 <= n <= max_n]
+    if outside:
+        parser.error(f"--show values must be in [1, {max_n}]: {', '.join(map(str, outside))}")
+
+    if args.from_csv:
+        store = WitnessStore.from_csv(args.from_csv)
+        print(f"Loaded {store.max_n:,} rows from {args.from_csv}")
+    else:
+        store = WitnessStore.build(args.N, verbose=True)
+    for n in args.show:
+        print(f"P_π({n}) = {store.partition_value(n)}: {'*'.join(map(str, store.witness(n)))}")
+    if args.save:
+        store.save(args.save)
+        print(f"Store saved to {args.save}")
+    if args.csv:
+        store.export_csv(args.csv)
+
+
+if __name__ == "__main__":
+    main()